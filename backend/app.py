@@ -29,6 +29,7 @@ from routes.google_map_api import googlemap_bp
 from routes.llm import llm_bp
 from routes.staff_task_api import staff_task_bp
 from routes.worker_task_api import worker_task_bp
+from routes.models_api import models_bp
 
 # Initialize Flask app
 app = Flask(__name__)
@@ -57,10 +58,22 @@ app.register_blueprint(llm_bp)
 app.register_blueprint(heatmap_bp)
 app.register_blueprint(staff_task_bp)
 app.register_blueprint(worker_task_bp)
+app.register_blueprint(models_bp)
 
 # Register SocketIO events
 import routes.stream_socket  # this defines your socketio.on events
 
+# Unknown MODEL_WARMUP entries would never load and keep /api/models/ready at 503
+unknown_models = [m for m in Config.MODEL_WARMUP if m not in routes.stream_socket.DETECTOR_MODULES]
+if unknown_models:
+    print(f"⚠️ [MODEL_WARMUP] Ignoring unknown stream models {unknown_models}; "
+          f"expected any of {list(routes.stream_socket.DETECTOR_MODULES)}")
+    Config.MODEL_WARMUP = [m for m in Config.MODEL_WARMUP if m not in unknown_models]
+
+# Optionally load models in the background; only in the process that serves (not the reloader parent)
+if Config.MODEL_WARMUP and (__name__ != '__main__' or os.environ.get("WERKZEUG_RUN_MAIN") == "true"):
+    routes.stream_socket.start_model_warmup(Config.MODEL_WARMUP)
+
 # Add default route to avoid "loading forever"
 @app.route("/")
 def index():
@@ -0,0 +1,224 @@
+"""
+Reproducible CPU benchmark of the detectors on a folder of sample frames.
+
+Every detector runs in its own fresh interpreter, so model loading and peak
+RSS are not shared between them. For each batch size the frames are read as
+encoded bytes, decoded with the stream's decode_image and passed to
+detect_objects (batch size 1) or detect_batch. Reported per detector and
+batch size:
+- frames/sec and per-call latency p50/p95/p99 (decode included),
+- seconds per frame spent in each stage: decode, preprocess, forward,
+  postprocess, BLIP captioning (caption_s), cross-encoder (ce_s), and for
+  the cascade the YOLO screen and the escalation rate,
+- load time, RSS after loading and peak RSS of the process.
+
+The memo caches of BLIP captions and cross-encoder scores are off unless
+--with-caches is given, so repeated frames are really captioned.
+
+Run from backend/:
+    python benchmarks/detectors.py --images ../model_pipelines/test_images --output bench.json
+    python benchmarks/detectors.py --images frames/ --detectors yolo combined_yolos --batch-sizes 1 4 8
+"""
+import argparse
+import glob
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BACKEND_DIR)
+
+DETECTORS = {
+    "grounding_dino": "detection_models.grounding_dino",
+    "owlvit": "detection_models.owlvit",
+    "yolo": "detection_models.yolo",
+    "combined_yolos": "detection_models.combined_yolos",
+    "cascade": "detection_models.cascade",
+}
+
+# Detectors whose detect_objects/detect_batch take the text labels as second argument
+TEXT_PROMPTED = {"grounding_dino", "owlvit", "yolo", "cascade"}
+
+
+def peak_rss_mb():
+    # ru_maxrss is in KiB on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 ** 2 if sys.platform == "darwin" else 1024), 1)
+
+
+def current_rss_mb():
+    try:
+        with open("/proc/self/statm") as f:
+            return round(int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024 ** 2, 1)
+    except OSError:
+        return None
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    rank = (len(ordered) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def list_images(directory):
+    return sorted(
+        path for ext in ("jpg", "jpeg", "png") for path in glob.glob(os.path.join(directory, f"*.{ext}"))
+    )
+
+
+def run_detector(name, paths, batch_sizes, labels, repeat):
+    """Benchmark one detector in this process; returns its JSON-ready report."""
+    import importlib
+    from utils.image_utils import decode_image
+    from utils.timings import timed
+
+    contents = []
+    for path in paths:
+        with open(path, "rb") as f:
+            contents.append(f.read())
+
+    start = time.perf_counter()
+    detector = importlib.import_module(DETECTORS[name])
+
+    args = (labels,) if name in TEXT_PROMPTED else ()
+
+    def call(frames, timings):
+        if len(frames) == 1:
+            return [detector.detect_objects(frames[0], *args, timings=timings)]
+        return detector.detect_batch(frames, *args, timings=timings)
+
+    # The first call loads the models through the registry
+    call([decode_image(contents[0])], None)
+    report = {
+        "load_s": round(time.perf_counter() - start, 2),
+        "rss_after_load_mb": current_rss_mb(),
+        "batch_sizes": {},
+    }
+
+    for batch_size in batch_sizes:
+        timings = {}
+        latencies = []
+        frames_done = 0
+        started = time.perf_counter()
+        for _ in range(repeat):
+            for i in range(0, len(contents), batch_size):
+                chunk = contents[i:i + batch_size]
+                call_start = time.perf_counter()
+                with timed(timings, "decode_s"):
+                    frames = [decode_image(content) for content in chunk]
+                call(frames, timings)
+                latencies.append(time.perf_counter() - call_start)
+                frames_done += len(chunk)
+        elapsed = time.perf_counter() - started
+
+        stages = {
+            key: round(value / frames_done, 5) for key, value in timings.items() if key.endswith("_s")
+        }
+        entry = {
+            "frames": frames_done,
+            "calls": len(latencies),
+            "fps": round(frames_done / elapsed, 3),
+            "latency_ms": {
+                f"p{pct}": round(percentile(latencies, pct) * 1000, 1) for pct in (50, 95, 99)
+            },
+            "stage_s_per_frame": stages,
+            "crops_per_frame": round(timings.get("crops", 0) / frames_done, 3),
+        }
+        if timings.get("frames"):
+            entry["escalation_rate"] = round(timings["escalated"] / timings["frames"], 3)
+        report["batch_sizes"][str(batch_size)] = entry
+        print(f"  {name} batch={batch_size}: {entry['fps']} fps, p95 {entry['latency_ms']['p95']} ms", file=sys.stderr)
+
+    report["peak_rss_mb"] = peak_rss_mb()
+    return report
+
+
+def environment():
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True, text=True
+        ).stdout.strip() or None
+    except OSError:
+        commit = None
+    info = {
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "processor": platform.processor() or None,
+        "cpu_count": os.cpu_count(),
+    }
+    try:
+        import torch
+        info.update({"torch": torch.__version__, "torch_threads": torch.get_num_threads(),
+                     "cuda": torch.cuda.is_available()})
+    except ImportError:
+        pass
+    return info
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--images", required=True, help="directory of sample frames (640x640 Street View JPEGs)")
+    parser.add_argument("--detectors", nargs="+", default=list(DETECTORS), choices=list(DETECTORS))
+    parser.add_argument("--batch-sizes", nargs="+", type=int, default=[1, 4, 8])
+    parser.add_argument("--repeat", type=int, default=1, help="passes over the image folder per batch size")
+    parser.add_argument("--labels", nargs="+", default=None, help="text labels (default: Config.LABELS)")
+    parser.add_argument("--with-caches", action="store_true", help="keep the caption/score memo caches on")
+    parser.add_argument("--output", help="write the JSON report here as well as to stdout")
+    parser.add_argument("--single", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    paths = list_images(args.images)
+    if not paths:
+        sys.exit(f"No images found in {args.images}")
+
+    if args.single:
+        # Child process: benchmark one detector and print its report as the last line
+        from config import Config
+        labels = args.labels or Config.LABELS
+        report = run_detector(args.single, paths, args.batch_sizes, labels, args.repeat)
+        print(json.dumps(report))
+        return
+
+    env = dict(os.environ)
+    if not args.with_caches:
+        env["VERIFY_CACHE_ENABLED"] = "false"
+    results = {
+        "environment": environment(),
+        "images": len(paths),
+        "batch_sizes": args.batch_sizes,
+        "repeat": args.repeat,
+        "caches": args.with_caches,
+        "detectors": {},
+    }
+    for name in args.detectors:
+        print(f"Benchmarking {name}...", file=sys.stderr)
+        command = [sys.executable, os.path.abspath(__file__), "--images", os.path.abspath(args.images), "--single", name,
+                   "--batch-sizes", *map(str, args.batch_sizes), "--repeat", str(args.repeat)]
+        if args.labels:
+            command += ["--labels", *args.labels]
+        child = subprocess.run(command, cwd=BACKEND_DIR, env=env, stdout=subprocess.PIPE, text=True)
+        lines = child.stdout.strip().splitlines()
+        if child.returncode != 0 or not lines:
+            results["detectors"][name] = {"error": f"exit status {child.returncode}"}
+            continue
+        results["detectors"][name] = json.loads(lines[-1])
+
+    output = json.dumps(results, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
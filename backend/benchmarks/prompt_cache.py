@@ -0,0 +1,145 @@
+"""
+Per-image CPU latency of Grounding DINO and OWL-ViT with and without the
+cached text-prompt encodings, plus a parity check of their outputs.
+
+"uncached" encodes the prompt together with every image (the old path);
+"cached" tokenizes / embeds the label set once and runs only the image side
+per image. Detections must be identical up to --score-tol.
+
+Run from backend/:
+    python benchmarks/prompt_cache.py --images ../model_pipelines/test_images
+    python benchmarks/prompt_cache.py --images ../model_pipelines/test_images --models owlvit
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import torch
+from PIL import Image
+
+from config import Config
+from detection_models.model_registry import registry, device
+from detection_models.prompt_cache import prompt_cache, encode_owlvit_queries, owlvit_detect_with_queries
+
+
+def dino_uncached(processor, model, image, labels):
+    wrapper = model.model.text_backbone
+    model.model.text_backbone = wrapper.backbone
+    try:
+        inputs = processor(images=image, text=labels, return_tensors="pt").to(device)
+        outputs = model(**inputs)
+    finally:
+        model.model.text_backbone = wrapper
+    return processor.post_process_grounded_object_detection(
+        outputs, inputs["input_ids"], box_threshold=0.3, text_threshold=0.25, target_sizes=[image.size[::-1]]
+    )[0]
+
+
+def dino_cached(processor, model, image, labels):
+    text_inputs = prompt_cache.get_or_compute(
+        ("grounding_dino", id(model), tuple(labels)),
+        lambda: processor(text=labels, return_tensors="pt").to(device),
+    )
+    image_inputs = processor.image_processor(images=image, return_tensors="pt").to(device)
+    outputs = model(**image_inputs, **text_inputs)
+    return processor.post_process_grounded_object_detection(
+        outputs, text_inputs["input_ids"], box_threshold=0.3, text_threshold=0.25, target_sizes=[image.size[::-1]]
+    )[0]
+
+
+def owlvit_uncached(processor, model, image, labels):
+    inputs = processor(text=labels, images=image, return_tensors="pt").to(device)
+    outputs = model(**inputs)
+    return processor.post_process_object_detection(
+        outputs=outputs, target_sizes=torch.tensor([image.size[::-1]]).to(device), threshold=0.1
+    )[0]
+
+
+def owlvit_cached(processor, model, image, labels):
+    query_embeds, query_mask = prompt_cache.get_or_compute(
+        ("owlvit", id(model), tuple(labels)),
+        lambda: encode_owlvit_queries(processor, model, labels, device),
+    )
+    pixel_values = processor(images=image, return_tensors="pt")["pixel_values"].to(device)
+    outputs = owlvit_detect_with_queries(model, pixel_values, query_embeds, query_mask)
+    return processor.post_process_object_detection(
+        outputs=outputs, target_sizes=torch.tensor([image.size[::-1]]).to(device), threshold=0.1
+    )[0]
+
+
+VARIANTS = {
+    "grounding_dino": (dino_uncached, dino_cached),
+    "owlvit": (owlvit_uncached, owlvit_cached),
+}
+
+
+def timed(func, processor, model, images, labels):
+    outputs = []
+    start = time.perf_counter()
+    with torch.no_grad():
+        for image in images:
+            outputs.append(func(processor, model, image, labels))
+    return outputs, (time.perf_counter() - start) / len(images)
+
+
+def parity(reference, candidate, score_tol):
+    """Largest score difference, or None when boxes/labels differ anywhere."""
+    max_diff = 0.0
+    for ref, cand in zip(reference, candidate):
+        if len(ref["scores"]) != len(cand["scores"]) or list(ref["labels"]) != list(cand["labels"]):
+            return None
+        if len(ref["scores"]):
+            max_diff = max(max_diff, float((ref["scores"] - cand["scores"]).abs().max()))
+            if float((ref["boxes"] - cand["boxes"]).abs().max()) > 1.0:
+                return None
+    return max_diff if max_diff <= score_tol else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--images", required=True, help="directory of test images")
+    parser.add_argument("--models", nargs="+", default=list(VARIANTS), choices=list(VARIANTS))
+    parser.add_argument("--labels", nargs="+", default=Config.LABELS)
+    parser.add_argument("--score-tol", type=float, default=1e-4)
+    args = parser.parse_args()
+
+    paths = sorted(
+        path for ext in ("jpg", "jpeg", "png") for path in glob.glob(os.path.join(args.images, f"*.{ext}"))
+    )
+    if not paths:
+        sys.exit(f"No images found in {args.images}")
+    images = [Image.open(path).convert("RGB") for path in paths]
+
+    report = {"device": str(device), "images": len(images), "labels": len(args.labels)}
+    failed = False
+    for name in args.models:
+        processor, model = registry.get(name)
+        uncached, cached = VARIANTS[name]
+        timed(uncached, processor, model, images[:1], args.labels)  # warmup
+        reference, uncached_s = timed(uncached, processor, model, images, args.labels)
+        prompt_cache.clear()
+        outputs, cached_s = timed(cached, processor, model, images, args.labels)
+        max_diff = parity(reference, outputs, args.score_tol)
+        failed |= max_diff is None
+        report[name] = {
+            "uncached_ms_per_image": round(uncached_s * 1000, 1),
+            "cached_ms_per_image": round(cached_s * 1000, 1),
+            "saved_ms_per_image": round((uncached_s - cached_s) * 1000, 1),
+            "speedup": round(uncached_s / cached_s, 2),
+            "parity": max_diff is not None,
+            "max_score_diff": max_diff,
+        }
+        registry.unload(name)
+
+    print(json.dumps(report, indent=2))
+    if failed:
+        print("❌ Cached prompt encodings changed the detections")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
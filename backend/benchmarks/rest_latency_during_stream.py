@@ -0,0 +1,113 @@
+"""
+Measure REST latency on a running backend while a live stream is active.
+
+Polls a REST endpoint for a baseline period, then starts a stream over
+Socket.IO and keeps polling until the stream completes (or --duration runs
+out). Prints p50/p95/p99/max for both phases, so you can see whether model
+inference stalls the gevent hub.
+
+Usage (backend running on :8000):
+    python benchmarks/rest_latency_during_stream.py --user-id 1 --model yolo \\
+        --start 37.3352,-121.8811 --end 37.3382,-121.8863 --points 10
+"""
+import argparse
+import json
+import threading
+import time
+
+import numpy as np
+import requests
+import socketio
+
+
+def percentiles(samples):
+    if not samples:
+        return {"count": 0}
+    values = np.array(samples) * 1000
+    return {
+        "count": len(samples),
+        "p50_ms": round(float(np.percentile(values, 50)), 1),
+        "p95_ms": round(float(np.percentile(values, 95)), 1),
+        "p99_ms": round(float(np.percentile(values, 99)), 1),
+        "max_ms": round(float(values.max()), 1),
+    }
+
+
+def poll(url, stop, samples, interval):
+    session = requests.Session()
+    while not stop.is_set():
+        start = time.perf_counter()
+        try:
+            session.get(url, timeout=30)
+            samples.append(time.perf_counter() - start)
+        except requests.RequestException as e:
+            print(f"[BENCH] request failed: {e}")
+        time.sleep(interval)
+
+
+def measure(url, seconds, interval, until=None):
+    stop, samples = threading.Event(), []
+    thread = threading.Thread(target=poll, args=(url, stop, samples, interval), daemon=True)
+    thread.start()
+    if until is not None:
+        until.wait(seconds)
+    else:
+        time.sleep(seconds)
+    stop.set()
+    thread.join()
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--server", default="http://localhost:8000")
+    parser.add_argument("--path", default="/", help="REST endpoint to poll")
+    parser.add_argument("--user-id", type=int, required=True)
+    parser.add_argument("--model", default="yolo", choices=["dino", "owlvit", "yolo", "cascade"])
+    parser.add_argument("--start", required=True, help="lat,lng")
+    parser.add_argument("--end", required=True, help="lat,lng")
+    parser.add_argument("--points", type=int, default=10)
+    parser.add_argument("--baseline", type=float, default=10, help="seconds polled before the stream")
+    parser.add_argument("--duration", type=float, default=300, help="max seconds polled during the stream")
+    parser.add_argument("--interval", type=float, default=0.05, help="pause between requests")
+    args = parser.parse_args()
+
+    url = args.server.rstrip("/") + args.path
+    start_lat, start_lng = (float(v) for v in args.start.split(","))
+    end_lat, end_lng = (float(v) for v in args.end.split(","))
+
+    print(f"Baseline: polling {url} for {args.baseline}s")
+    baseline = measure(url, args.baseline, args.interval)
+
+    frames = []
+    finished = threading.Event()
+    client = socketio.Client()
+    client.on("start_stream", lambda data: frames.append(time.perf_counter()))
+    client.on("stream_session", lambda data: data.get("status") in ("completed", "stopped") and finished.set())
+    client.connect(args.server)
+    client.emit("start_stream", {
+        "userId": args.user_id,
+        "startLatInput": start_lat, "startLngInput": start_lng,
+        "endLatInput": end_lat, "endLngInput": end_lng,
+        "num_points": args.points,
+        "model": args.model,
+        "preview": "binary",
+    })
+
+    print(f"Streaming: polling {url} until the stream completes (max {args.duration}s)")
+    started = time.perf_counter()
+    during = measure(url, args.duration, args.interval, until=finished)
+    elapsed = time.perf_counter() - started
+    client.disconnect()
+
+    print(json.dumps({
+        "endpoint": url,
+        "model": args.model,
+        "stream": {"frames": len(frames), "seconds": round(elapsed, 1), "completed": finished.is_set()},
+        "baseline": percentiles(baseline),
+        "during_stream": percentiles(during),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Track backend startup cost.
+
+Measures, each in a fresh interpreter:
+- import time of the app module (and whether torch got imported with it),
+- time from launching the server to its first successful REST response,
+- with --warmup, time until /api/models/ready reports the warmed models loaded.
+
+Run from backend/ (the port must be free):
+    python benchmarks/startup_time.py
+    python benchmarks/startup_time.py --warmup yolo,dino
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+import requests
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT_PROBE = (
+    "import sys, time; start = time.perf_counter(); import app; "
+    "print(time.perf_counter() - start, 'torch' in sys.modules)"
+)
+
+SERVER = (
+    "import os, app; "
+    "app.socketio.run(app.app, host='127.0.0.1', port=int(os.environ['STARTUP_BENCH_PORT']), debug=False)"
+)
+
+
+def measure_import(env):
+    output = subprocess.run(
+        [sys.executable, "-c", IMPORT_PROBE], cwd=BACKEND_DIR, env=env,
+        capture_output=True, text=True, check=True
+    ).stdout.strip().splitlines()[-1]
+    seconds, torch_loaded = output.split()
+    return float(seconds), torch_loaded == "True"
+
+
+def wait_for(url, deadline, expect_status=200):
+    while time.perf_counter() < deadline:
+        try:
+            if requests.get(url, timeout=2).status_code == expect_status:
+                return True
+        except requests.RequestException:
+            pass
+        time.sleep(0.1)
+    return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--path", default="/api/test", help="REST endpoint used as the first request")
+    parser.add_argument("--warmup", default="", help="MODEL_WARMUP value, e.g. yolo,dino")
+    parser.add_argument("--timeout", type=float, default=600)
+    args = parser.parse_args()
+
+    env = {**os.environ, "MODEL_WARMUP": args.warmup, "STARTUP_BENCH_PORT": str(args.port)}
+    import_seconds, torch_imported = measure_import(env)
+
+    base = f"http://127.0.0.1:{args.port}"
+    started = time.perf_counter()
+    server = subprocess.Popen([sys.executable, "-c", SERVER], cwd=BACKEND_DIR, env=env)
+    try:
+        deadline = started + args.timeout
+        first_request = wait_for(base + args.path, deadline) and time.perf_counter() - started
+        ready = None
+        if args.warmup:
+            ready = wait_for(base + "/api/models/ready", deadline) and time.perf_counter() - started
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+    print(json.dumps({
+        "import_app_s": round(import_seconds, 2),
+        "torch_imported_at_startup": torch_imported,
+        "time_to_first_request_s": round(first_request, 2) if first_request else None,
+        "warmup": args.warmup or None,
+        "time_to_models_ready_s": round(ready, 2) if ready else None,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
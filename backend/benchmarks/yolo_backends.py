@@ -0,0 +1,110 @@
+"""
+Parity and CPU throughput check of the exported YOLO backends against the
+eager PyTorch weights.
+
+Every image in --images is run through the ensemble once per backend. For
+parity, each PyTorch detection is matched to the exported backend's
+detection with the same label and the highest IoU. A detection agrees when
+IoU >= --iou and |score difference| <= --score-tol. Throughput is reported in
+frames/second for the same batch size the stream uses (one waypoint = 4
+frames). The exit status is 1 when any backend agrees on fewer than
+--min-agreement of the detections, so this can gate a backend switch.
+
+Run from backend/:
+    python benchmarks/yolo_backends.py --images ../model_pipelines/test_images \\
+        --backends onnx onnx-int8 openvino
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from detection_models.yolo_ensemble import YoloEnsemble
+
+
+def box_iou(a, b):
+    x1, y1 = max(a[0], b[0]), max(a[1], b[1])
+    x2, y2 = min(a[2], b[2]), min(a[3], b[3])
+    inter = max(0, x2 - x1) * max(0, y2 - y1)
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return inter / union if union > 0 else 0.0
+
+
+def run(ensemble, images, batch_size, threshold):
+    ensemble.load()
+    ensemble.detect_batch(images[:batch_size], threshold)  # warmup
+    outputs = []
+    start = time.perf_counter()
+    for i in range(0, len(images), batch_size):
+        outputs.extend(ensemble.detect_batch(images[i:i + batch_size], threshold))
+    elapsed = time.perf_counter() - start
+    return [dets for _, dets in outputs], len(images) / elapsed
+
+
+def compare(reference, candidate, iou_threshold, score_tol):
+    matched = total = 0
+    score_diffs = []
+    for ref_dets, cand_dets in zip(reference, candidate):
+        for ref in ref_dets:
+            total += 1
+            same_label = [c for c in cand_dets if c["label"] == ref["label"]]
+            if not same_label:
+                continue
+            best = max(same_label, key=lambda c: box_iou(ref["box"], c["box"]))
+            diff = abs(best["score"] - ref["score"])
+            if box_iou(ref["box"], best["box"]) >= iou_threshold and diff <= score_tol:
+                matched += 1
+                score_diffs.append(diff)
+    extra = sum(len(c) for c in candidate) - sum(len(r) for r in reference)
+    return {
+        "reference_detections": total,
+        "agreement": round(matched / total, 4) if total else 1.0,
+        "max_score_diff": round(max(score_diffs), 4) if score_diffs else 0.0,
+        "detection_count_delta": extra,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--images", required=True, help="directory of test images")
+    parser.add_argument("--backends", nargs="+", default=["onnx"],
+                        help="any of onnx, onnx-int8, openvino, openvino-int8")
+    parser.add_argument("--batch-size", type=int, default=4)
+    parser.add_argument("--threshold", type=float, default=0.25)
+    parser.add_argument("--iou", type=float, default=0.9)
+    parser.add_argument("--score-tol", type=float, default=0.05)
+    parser.add_argument("--min-agreement", type=float, default=0.95)
+    args = parser.parse_args()
+
+    images = sorted(
+        path for ext in ("jpg", "jpeg", "png") for path in glob.glob(os.path.join(args.images, f"*.{ext}"))
+    )
+    if not images:
+        sys.exit(f"No images found in {args.images}")
+
+    print(f"PyTorch reference on {len(images)} images...")
+    reference, reference_fps = run(YoloEnsemble(backend="pytorch"), images, args.batch_size, args.threshold)
+    report = {"images": len(images), "batch_size": args.batch_size, "pytorch": {"fps": round(reference_fps, 2)}}
+
+    failed = False
+    for name in args.backends:
+        backend, _, variant = name.partition("-")
+        print(f"{name}...")
+        outputs, fps = run(
+            YoloEnsemble(backend=backend, int8=variant == "int8"), images, args.batch_size, args.threshold
+        )
+        parity = compare(reference, outputs, args.iou, args.score_tol)
+        report[name] = {"fps": round(fps, 2), "speedup": round(fps / reference_fps, 2), **parity}
+        failed |= parity["agreement"] < args.min_agreement
+
+    print(json.dumps(report, indent=2))
+    if failed:
+        print(f"❌ Parity below {args.min_agreement:.0%} for at least one backend")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
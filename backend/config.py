@@ -7,3 +7,91 @@ class Config:
     CORS_HEADERS = "Content-Type"
     LABELS = ["graffiti", "crack", "tent"]
     ALLOWED_KEYWORDS = ["graffiti", "crack", "tent"]
+
+    # Live stream pipeline: worker count per stage and bounded queue size between stages
+    STREAM_FETCH_WORKERS = int(os.getenv("STREAM_FETCH_WORKERS", 2))
+    STREAM_PREPROCESS_WORKERS = int(os.getenv("STREAM_PREPROCESS_WORKERS", 1))
+    STREAM_DETECT_WORKERS = int(os.getenv("STREAM_DETECT_WORKERS", 1))
+    STREAM_PERSIST_WORKERS = int(os.getenv("STREAM_PERSIST_WORKERS", 2))
+    STREAM_QUEUE_SIZE = int(os.getenv("STREAM_QUEUE_SIZE", 2))
+
+    # Reverse-geocode cache (SQLite), keyed on lat/lon rounded to GEOCODE_CACHE_PRECISION decimals
+    GEOCODE_CACHE_PATH = os.getenv("GEOCODE_CACHE_PATH", "cache/geocode.sqlite3")
+    GEOCODE_CACHE_TTL = int(os.getenv("GEOCODE_CACHE_TTL", 30 * 24 * 3600))
+    GEOCODE_CACHE_MAX_ENTRIES = int(os.getenv("GEOCODE_CACHE_MAX_ENTRIES", 50000))
+    GEOCODE_CACHE_PRECISION = int(os.getenv("GEOCODE_CACHE_PRECISION", 5))
+
+    # Street View image cache (raw JPEG bytes on disk, LRU-evicted past the byte budget)
+    STREETVIEW_CACHE_DIR = os.getenv("STREETVIEW_CACHE_DIR", "cache/streetview")
+    STREETVIEW_CACHE_MAX_BYTES = int(os.getenv("STREETVIEW_CACHE_MAX_BYTES", 2 * 1024 ** 3))
+    STREETVIEW_CACHE_ONLY = os.getenv("STREETVIEW_CACHE_ONLY", "false").lower() == "true"
+
+    # Shared S3 upload service; set S3_ENDPOINT_URL to target a local S3 stand-in (MinIO, moto)
+    S3_UPLOAD_WORKERS = int(os.getenv("S3_UPLOAD_WORKERS", 8))
+    S3_UPLOAD_RETRIES = int(os.getenv("S3_UPLOAD_RETRIES", 3))
+    S3_UPLOAD_BACKOFF = float(os.getenv("S3_UPLOAD_BACKOFF", 0.5))
+    S3_ENDPOINT_URL = os.getenv("S3_ENDPOINT_URL") or None
+
+    # Google Maps client: process-wide requests/second budget per API, shared by all streams
+    MAPS_GEOCODE_QPS = float(os.getenv("MAPS_GEOCODE_QPS", 10))
+    MAPS_STREETVIEW_QPS = float(os.getenv("MAPS_STREETVIEW_QPS", 20))
+    MAPS_METADATA_QPS = float(os.getenv("MAPS_METADATA_QPS", 20))
+    MAPS_MAX_CONCURRENCY = int(os.getenv("MAPS_MAX_CONCURRENCY", 8))
+    MAPS_MAX_RETRIES = int(os.getenv("MAPS_MAX_RETRIES", 3))
+
+    # Checkpoints of live stream sessions, used to resume a route after a disconnect
+    STREAM_SESSION_DB_PATH = os.getenv("STREAM_SESSION_DB_PATH", "cache/stream_sessions.sqlite3")
+
+    # Resolve route points to Street View panoramas first, skipping empty and duplicate ones
+    STREETVIEW_METADATA_CHECK = os.getenv("STREETVIEW_METADATA_CHECK", "true").lower() == "true"
+
+    # Frames a stream may emit ahead of the client's acknowledgements (clients that send frame_ack)
+    STREAM_MAX_INFLIGHT_FRAMES = int(os.getenv("STREAM_MAX_INFLIGHT_FRAMES", 8))
+
+    # Live preview delivery: "url" uploads every frame to S3, "binary" sends a thumbnail over the
+    # socket and only uploads frames with detections
+    STREAM_PREVIEW_MODE = os.getenv("STREAM_PREVIEW_MODE", "url")
+    STREAM_PREVIEW_FORMAT = os.getenv("STREAM_PREVIEW_FORMAT", "jpeg")
+    STREAM_PREVIEW_MAX_SIZE = int(os.getenv("STREAM_PREVIEW_MAX_SIZE", 320))
+    STREAM_PREVIEW_QUALITY = int(os.getenv("STREAM_PREVIEW_QUALITY", 75))
+
+    # Native threads running model inference outside the gevent hub (shared by all streams)
+    INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", 1))
+
+    # Detections within this many meters of an event with the same detection type join that event (0 disables)
+    EVENT_CLUSTER_RADIUS_M = float(os.getenv("EVENT_CLUSTER_RADIUS_M", 15))
+
+    # YOLO inference backend: "pytorch" (the .pt weights), or "onnx" / "openvino" exported next to them
+    YOLO_BACKEND = os.getenv("YOLO_BACKEND", "pytorch")
+    YOLO_INT8 = os.getenv("YOLO_INT8", "false").lower() == "true"
+
+    # Weight memory the shared model registry may keep loaded before unloading idle models (0 = unlimited)
+    MODEL_MEMORY_BUDGET_MB = float(os.getenv("MODEL_MEMORY_BUDGET_MB", 0))
+
+    # Stream models ("dino", "owlvit", "yolo", "cascade", comma separated) to load and warm up in the background at startup
+    MODEL_WARMUP = [m.strip() for m in os.getenv("MODEL_WARMUP", "").split(",") if m.strip()]
+
+    # Memo caches of BLIP captions (by crop perceptual hash) and cross-encoder scores; "" keeps them in memory only
+    VERIFY_CACHE_ENABLED = os.getenv("VERIFY_CACHE_ENABLED", "true").lower() == "true"
+    VERIFY_CACHE_MAX_ENTRIES = int(os.getenv("VERIFY_CACHE_MAX_ENTRIES", 20000))
+    VERIFY_CACHE_PATH = os.getenv("VERIFY_CACHE_PATH", "cache/verification.sqlite3")
+
+    # "cascade" stream model: YOLO screens every frame and only frames with a detection scoring between
+    # CASCADE_MIN_SCORE and CASCADE_ACCEPT_SCORE, a CASCADE_ESCALATE_LABELS label or (with
+    # CASCADE_ESCALATE_EMPTY) no detection at all are re-checked by GroundingDINO + BLIP + cross-encoder.
+    # YOLO labels are the "yolo" model's ("a graffiti vandalism", "a tent on the sidewalk", "a crack on the road")
+    CASCADE_MIN_SCORE = float(os.getenv("CASCADE_MIN_SCORE", 0.25))
+    CASCADE_ACCEPT_SCORE = float(os.getenv("CASCADE_ACCEPT_SCORE", 0.6))
+    CASCADE_ESCALATE_LABELS = [l.strip() for l in os.getenv("CASCADE_ESCALATE_LABELS", "").split(",") if l.strip()]
+    CASCADE_ESCALATE_EMPTY = os.getenv("CASCADE_ESCALATE_EMPTY", "false").lower() == "true"
+    # Kept YOLO and GroundingDINO boxes of one frame with the same detection type and at least this IoU are merged
+    CASCADE_DEDUP_IOU = float(os.getenv("CASCADE_DEDUP_IOU", 0.7))
+
+    # Frame quality gate before inference: skip placeholder/uniform, blurred, badly exposed and
+    # near-duplicate frames (per heading); a threshold of 0 disables that check
+    FRAME_GATE_ENABLED = os.getenv("FRAME_GATE_ENABLED", "true").lower() == "true"
+    FRAME_GATE_MAX_UNIFORM = float(os.getenv("FRAME_GATE_MAX_UNIFORM", 0.95))
+    FRAME_GATE_MIN_SHARPNESS = float(os.getenv("FRAME_GATE_MIN_SHARPNESS", 30))
+    FRAME_GATE_MIN_BRIGHTNESS = float(os.getenv("FRAME_GATE_MIN_BRIGHTNESS", 20))
+    FRAME_GATE_MAX_BRIGHTNESS = float(os.getenv("FRAME_GATE_MAX_BRIGHTNESS", 240))
+    FRAME_GATE_DUPLICATE_DIFF = float(os.getenv("FRAME_GATE_DUPLICATE_DIFF", 2.0))
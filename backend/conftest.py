@@ -0,0 +1 @@
+# Lets the tests under tests/ import backend modules (config, utils, detection_models) as the app does
@@ -0,0 +1,119 @@
+import time
+from typing import Dict, List, Optional, Sequence
+
+import torch
+from PIL import Image
+
+from config import Config
+from detection_models.model_registry import registry, device, BLIP_MODEL_ID, CROSS_ENCODER_MODEL_ID
+from utils.image_utils import dhash
+from utils.memo_cache import MemoCache
+from utils.timings import add_timing
+
+# Crops captioned per BLIP generate() call; bounds peak memory on cluttered scenes
+CAPTION_BATCH_SIZE = 16
+
+# ===== Memo caches =====
+# Repeat patrols see near-identical crops: captions are keyed by the crop's
+# perceptual hash, cross-encoder scores by the (label, caption) pair.
+caption_cache = alignment_cache = None
+if Config.VERIFY_CACHE_ENABLED:
+    caption_cache = MemoCache("blip_captions", Config.VERIFY_CACHE_MAX_ENTRIES, Config.VERIFY_CACHE_PATH or None)
+    alignment_cache = MemoCache("ce_scores", Config.VERIFY_CACHE_MAX_ENTRIES, Config.VERIFY_CACHE_PATH or None)
+
+
+def crop_with_padding(image: Image.Image, box, pad_pct: float = 0.2) -> Image.Image:
+    """Crop a detection box expanded by pad_pct on each side, clamped to the image."""
+    w, h = image.size
+    x1, y1, x2, y2 = map(int, box)
+    px, py = int((x2 - x1) * pad_pct), int((y2 - y1) * pad_pct)
+    return image.crop((max(0, x1 - px), max(0, y1 - py), min(w, x2 + px), min(h, y2 + py)))
+
+
+def caption_crops(crops: Sequence[Image.Image], timings: Optional[Dict] = None,
+                  batch_size: int = CAPTION_BATCH_SIZE) -> List[str]:
+    """
+    Caption all crops with BLIP, batch_size crops per generate() call. Crops
+    whose perceptual hash is in the caption cache are not sent to BLIP.
+    """
+    if not crops:
+        return []
+    start = time.perf_counter()
+    captions = [None] * len(crops)
+    keys = [f"{BLIP_MODEL_ID}:{dhash(crop)}" for crop in crops] if caption_cache else None
+    if caption_cache:
+        for index, key in enumerate(keys):
+            captions[index] = caption_cache.get(key)
+    pending = [index for index, caption in enumerate(captions) if caption is None]
+    add_timing(timings, "caption_cache_hits", len(crops) - len(pending))
+
+    if pending:
+        with registry.use("blip") as (blip_processor, blip_model):
+            for i in range(0, len(pending), batch_size):
+                chunk = pending[i:i + batch_size]
+                inputs = blip_processor(images=[crops[index] for index in chunk], return_tensors="pt").to(device)
+                with torch.no_grad():
+                    ids = blip_model.generate(**inputs)
+                for index, caption in zip(chunk, blip_processor.batch_decode(ids, skip_special_tokens=True)):
+                    captions[index] = caption
+                    if caption_cache:
+                        caption_cache.put(keys[index], caption)
+    add_timing(timings, "caption_s", time.perf_counter() - start)
+    return captions
+
+
+def score_alignment(labels: Sequence[str], captions: Sequence[str], timings: Optional[Dict] = None) -> List[float]:
+    """
+    Cross-encoder similarity of every (label, caption) pair, in one predict()
+    call for the pairs not already in the alignment cache.
+    """
+    if not labels:
+        return []
+    start = time.perf_counter()
+    pairs = list(zip(labels, captions))
+    scores = [None] * len(pairs)
+    keys = [f"{CROSS_ENCODER_MODEL_ID}:{label}\t{caption}" for label, caption in pairs] if alignment_cache else None
+    if alignment_cache:
+        for index, key in enumerate(keys):
+            scores[index] = alignment_cache.get(key)
+    pending = [index for index, score in enumerate(scores) if score is None]
+    add_timing(timings, "ce_cache_hits", len(pairs) - len(pending))
+
+    if pending:
+        with registry.use("cross_encoder") as cross_encoder:
+            predicted = cross_encoder.predict([pairs[index] for index in pending])
+        for index, score in zip(pending, predicted):
+            scores[index] = float(score)
+            if alignment_cache:
+                alignment_cache.put(keys[index], scores[index])
+    add_timing(timings, "ce_s", time.perf_counter() - start)
+    return scores
+
+
+def cache_stats():
+    """Hit-rate metrics of the caption and alignment caches."""
+    return {
+        "captions": caption_cache.stats() if caption_cache else None,
+        "alignment": alignment_cache.stats() if alignment_cache else None,
+    }
+
+
+def verify_candidates(candidates: List[Dict], ce_threshold: float, timings: Optional[Dict] = None) -> List[Dict]:
+    """
+    Caption and score every candidate at once and return those whose caption
+    aligns with their label. Each candidate is a dict with "label" and "crop"
+    and may come from any frame, so a whole waypoint can be verified in one
+    BLIP batch and one cross-encoder call. Survivors get "caption" and
+    "ce_score" added; "crop" is removed.
+    """
+    captions = caption_crops([c["crop"] for c in candidates], timings)
+    scores = score_alignment([c["label"] for c in candidates], captions, timings)
+    add_timing(timings, "crops", len(candidates))
+
+    verified = []
+    for candidate, caption, score in zip(candidates, captions, scores):
+        candidate.pop("crop")
+        print(f"CE Alignment: label={candidate['label']}, caption='{caption}', score={score:.3f}")
+        if score >= ce_threshold:
+            verified.append({**candidate, "caption": caption, "ce_score": score})
+    return verified
@@ -0,0 +1,108 @@
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from config import Config
+from detection_models import combined_yolos, grounding_dino
+from detection_models.yolo import map_detection_to_label
+from utils.mysql_db_utils import get_detected_type
+from utils.timings import add_timing, timed
+
+# ===== Cascade =====
+# The YOLO ensemble screens every frame; GroundingDINO + BLIP + cross-encoder
+# only run on the frames YOLO is unsure about. Thresholds and labels default
+# to the CASCADE_* settings in Config. YOLO detections are labelled like the
+# "yolo" stream model ("a tent on the sidewalk", ...), not with raw class names.
+
+
+def needs_escalation(detections: List[Dict],
+                     accept_score: float = Config.CASCADE_ACCEPT_SCORE,
+                     escalate_labels: List[str] = Config.CASCADE_ESCALATE_LABELS,
+                     escalate_empty: bool = Config.CASCADE_ESCALATE_EMPTY) -> bool:
+    """True when a frame's YOLO detections are not conclusive on their own."""
+    if not detections:
+        return escalate_empty
+    return any(d["score"] < accept_score or d["label"] in escalate_labels for d in detections)
+
+
+def detection_type(label: str) -> str:
+    """The detection type a label is stored as (see get_detected_type); unknown labels stand for themselves."""
+    try:
+        return get_detected_type(label).name
+    except ValueError:
+        return label
+
+
+def deduplicate(detections: List[Dict], iou_threshold: float = Config.CASCADE_DEDUP_IOU) -> List[Dict]:
+    """
+    Drop detections overlapping a higher-scoring detection of the same
+    detection type by at least `iou_threshold`, e.g. a confident YOLO
+    "a tent on the sidewalk" box that GroundingDINO finds again as "tent".
+    Kept detections stay in their original order.
+    """
+    if len(detections) < 2:
+        return detections
+    boxes = np.array([d["box"] for d in detections], dtype=np.float64)
+    labels = np.array([detection_type(d["label"]) for d in detections])
+    area = np.clip(boxes[:, 2] - boxes[:, 0], 0, None) * np.clip(boxes[:, 3] - boxes[:, 1], 0, None)
+    top_left = np.maximum(boxes[:, None, :2], boxes[None, :, :2])
+    bottom_right = np.minimum(boxes[:, None, 2:], boxes[None, :, 2:])
+    wh = np.clip(bottom_right - top_left, 0, None)
+    inter = wh[..., 0] * wh[..., 1]
+    union = area[:, None] + area[None, :] - inter
+    with np.errstate(divide="ignore", invalid="ignore"):
+        duplicate = (np.where(union > 0, inter / union, 0.0) >= iou_threshold) & (labels[:, None] == labels[None, :])
+
+    keep = np.ones(len(detections), dtype=bool)
+    for index in sorted(range(len(detections)), key=lambda i: -detections[i]["score"]):
+        if keep[index]:
+            duplicate[index, index] = False
+            keep &= ~duplicate[index]
+    return [d for d, kept in zip(detections, keep) if kept]
+
+
+def detect_objects(image, text_labels: List[str], timings: Dict = None) -> Tuple[bool, List[Dict]]:
+    return detect_batch([image], text_labels, timings=timings)[0]
+
+
+def detect_batch(frames,
+                 text_labels: List[str],
+                 min_score: float = Config.CASCADE_MIN_SCORE,
+                 accept_score: float = Config.CASCADE_ACCEPT_SCORE,
+                 escalate_labels: List[str] = Config.CASCADE_ESCALATE_LABELS,
+                 escalate_empty: bool = Config.CASCADE_ESCALATE_EMPTY,
+                 timings: Dict = None) -> List[Tuple[bool, List[Dict]]]:
+    """
+    Screen `frames` with YOLO at `min_score` and send the frames that need
+    escalation to GroundingDINO as one batch. Confident YOLO detections are
+    kept; the uncertain ones of an escalated frame are replaced by whatever
+    GroundingDINO verifies, and duplicates of the same detection type are
+    then merged (deduplicate). Returns one (detected, output) per frame, like the other
+    detectors; every detection has box, label, score, caption and ce_score,
+    the last two None for YOLO detections. `timings` also collects the
+    number of frames screened and escalated.
+    """
+    with timed(timings, "screen_s"):
+        screened = combined_yolos.detect_batch(
+            frames, min_score, timings=timings,
+            label_fn=lambda model_name, class_name, score: map_detection_to_label(model_name, score),
+        )
+
+    outputs = []
+    escalated = []
+    for index, (_, detections) in enumerate(screened):
+        if needs_escalation(detections, accept_score, escalate_labels, escalate_empty):
+            escalated.append(index)
+        outputs.append([
+            {**d, "caption": None, "ce_score": None}
+            for d in detections if d["score"] >= accept_score and d["label"] not in escalate_labels
+        ])
+
+    if escalated:
+        verified = grounding_dino.detect_batch([frames[i] for i in escalated], text_labels, timings=timings)
+        for index, (_, output) in zip(escalated, verified):
+            outputs[index] = deduplicate(outputs[index] + output)
+
+    add_timing(timings, "frames", len(frames))
+    add_timing(timings, "escalated", len(escalated))
+    return [(len(output) > 0, output) for output in outputs]
@@ -1,9 +1,7 @@
-import os
 import torch
-import numpy as np
-from PIL import Image
 from typing import List, Tuple, Dict
-from ultralytics import YOLO
+from detection_models import yolo_ensemble
+from detection_models.model_registry import registry
 
 # ===== Check CUDA availability =====
 device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
@@ -13,66 +11,35 @@ else:
     print("CUDA not available, using CPU.")
 
 # ===== Configuration =====
-YOLO_MODEL_PATHS = {
-    "road damage": "./models/road damage.pt",
-    "homeless":    "./models/homeless.pt",
-    "graffiti":    "./models/graffiti.pt"
-}
+YOLO_MODEL_PATHS = yolo_ensemble.YOLO_MODEL_PATHS
 CONFIDENCE_THRESHOLD = 0.25
 
 # ===== Model Registry =====
-yolo_models = {}
-
-# ===== Guarded Initialization =====
-if os.environ.get("WERKZEUG_RUN_MAIN") == "true" or __name__ == "__main__":
-    print("Loading YOLO models...")
-    for name, path in YOLO_MODEL_PATHS.items():
-        model = YOLO(path)
-        model.to(device)
-        yolo_models[name] = model
-    print(f"YOLO Models loaded: {', '.join(yolo_models.keys())}")
+# The ensemble lives in the shared model registry (also used by detection_models.yolo)
+# and loads on first use, or at startup with MODEL_WARMUP=yolo
 
 # ===== Detection Function =====
 def detect_objects(
-    image_path: str,
-    threshold: float = CONFIDENCE_THRESHOLD
+    image,
+    threshold: float = CONFIDENCE_THRESHOLD,
+    timings: Dict = None
 ) -> Tuple[bool, List[Dict]]:
-
-    if not yolo_models:
-        raise RuntimeError("YOLO models not loaded. Check WERKZEUG_RUN_MAIN or call from __main__")
-
+    return detect_batch([image], threshold, timings)[0]
+
+
+def detect_batch(
+    frames,
+    threshold: float = CONFIDENCE_THRESHOLD,
+    timings: Dict = None,
+    label_fn=None
+) -> List[Tuple[bool, List[Dict]]]:
+    """
+    Run every YOLO model once over a batch of frames; one (detected, detections) per frame.
+    `label_fn` is passed on to YoloEnsemble.detect_batch (raw class names by default).
+    """
     threshold = float(threshold[0]) if isinstance(threshold, list) else float(threshold)
-
-    image = Image.open(image_path).convert("RGB")
-    img_np = np.array(image)
-    filtered_output = []
-
-    for model_name, model in yolo_models.items():
-        results = model(img_np)
-        result = results[0]
-
-        if result.boxes is None or len(result.boxes) == 0:
-            continue
-
-        boxes = result.boxes.xyxy.cpu().numpy()
-        scores = result.boxes.conf.cpu().numpy()
-        classes = result.boxes.cls.cpu().numpy().astype(int)
-
-        for box, score, cls in zip(boxes, scores, classes):
-            score = float(score)
-            if score < threshold:
-                continue
-
-            label = model.names[cls]
-            x1, y1, x2, y2 = map(int, box.tolist())
-            filtered_output.append({
-                "box": [x1, y1, x2, y2],
-                "label": label,
-                "score": score
-            })
-
-    detected = len(filtered_output) > 0
-    return detected, filtered_output
+    with registry.use("yolo") as ensemble:
+        return ensemble.detect_batch(frames, threshold, label_fn=label_fn, timings=timings)
 
 # ===== CLI Test =====
 if __name__ == "__main__":
@@ -1,113 +1,112 @@
-import os, torch, time
-import numpy as np
-from PIL import Image
-from typing import List
-from transformers import (
-    AutoProcessor, AutoModelForZeroShotObjectDetection,
-    BlipProcessor, BlipForConditionalGeneration
-)
-from sentence_transformers import CrossEncoder
+import torch, time
+from typing import Dict, List
+from detection_models.model_registry import registry, device
+from detection_models.caption_verifier import crop_with_padding, verify_candidates
+from detection_models.prompt_cache import prompt_cache
+from utils.image_utils import load_rgb_image
+from utils.timings import add_timing, timed
 
-# ===== Device setup =====
-device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
 print(f"Using device: {device}")
 
-# ===== Models (loaded once) =====
-dino_model_id = "IDEA-Research/grounding-dino-base"
-dino_processor = AutoProcessor.from_pretrained(dino_model_id, use_fast=True)
-dino_model = AutoModelForZeroShotObjectDetection.from_pretrained(dino_model_id).to(device)
-dino_model.eval()
-
-blip_model_id = "Salesforce/blip-image-captioning-base"
-blip_processor = BlipProcessor.from_pretrained(blip_model_id, use_fast=True)
-blip_model = BlipForConditionalGeneration.from_pretrained(blip_model_id).to(device)
-blip_model.eval()
-
-ce_model = "cross-encoder/stsb-roberta-base"
-cross_encoder = CrossEncoder(ce_model)
+# ===== Models =====
+# GroundingDINO, BLIP and the cross-encoder are loaded on first use by the
+# shared model registry; BLIP and the cross-encoder are shared with OWL-ViT.
 
 # ===== Helpers =====
 def tolist(x):
     return x if isinstance(x, list) else x.cpu().tolist()
 
-def generate_caption(crop_img):
-    """Generate BLIP caption for the cropped region."""
-    inputs = blip_processor(images=crop_img, return_tensors="pt").to(device)
-    with torch.no_grad():
-        ids = blip_model.generate(**inputs)
-    return blip_processor.decode(ids[0], skip_special_tokens=True)
 
-def check_alignment(label, caption, ce_threshold):
-    """Check if BLIP caption aligns with label using CrossEncoder."""
-    score = cross_encoder.predict([(label, caption)])[0]
-    print(f"CE Alignment: label={label}, caption='{caption}', score={score:.3f}")
-    return score >= ce_threshold, score
+def propose(image, text_labels, threshold, text_threshold, allowed_keywords, pad_pct, timings=None):
+    """Run GroundingDINO on one RGB PIL image and return keyword-filtered candidates with their crops."""
+    w, h = image.size
+    start = time.perf_counter()
+    with registry.use("grounding_dino") as (dino_processor, dino_model):
+        with timed(timings, "preprocess_s"):
+            # The prompt is tokenized once per label set (and its BERT encoding
+            # memoized by the text backbone wrapper); only the image is new per call
+            text_inputs = prompt_cache.get_or_compute(
+                ("grounding_dino", id(dino_model), tuple(text_labels)),
+                lambda: dino_processor(text=text_labels, return_tensors="pt").to(device),
+            )
+            image_inputs = dino_processor.image_processor(images=image, return_tensors="pt").to(device)
+        with timed(timings, "forward_s"), torch.no_grad():
+            outputs = dino_model(**image_inputs, **text_inputs)
+        with timed(timings, "postprocess_s"):
+            results = dino_processor.post_process_grounded_object_detection(
+                outputs,
+                text_inputs["input_ids"],
+                box_threshold=threshold,
+                text_threshold=text_threshold,
+                target_sizes=[(h, w)]
+            )[0]
+    add_timing(timings, "detector_s", time.perf_counter() - start)
+
+    boxes = tolist(results.get("boxes", []))
+    labels = results.get("labels", [])
+    scores = tolist(results.get("scores", []))
+
+    candidates = []
+    for box, label, score in zip(boxes, labels, scores):
+        if not any(keyword in label.lower() for keyword in allowed_keywords):
+            continue
+        x1, y1, x2, y2 = map(int, box)
+        candidates.append({
+            "box": [x1, y1, x2, y2],
+            "label": label,
+            "score": float(score),
+            # Expanded crop for the BLIP caption
+            "crop": crop_with_padding(image, (x1, y1, x2, y2), pad_pct),
+        })
+    return candidates
 
 
 # ===== Main Function =====
-def detect_objects(image_path: str,
+def detect_objects(image,
                    text_labels: List[str],
                    threshold: float = 0.35,
                    text_threshold: float = 0.3,
                    allowed_keywords: List[str] = None,
                    ce_threshold: float = 0.05,
-                   pad_pct: float = 0.2):
+                   pad_pct: float = 0.2,
+                   timings: Dict = None):
     """
     Detect objects in an image using GroundingDINO + BLIP + CrossEncoder alignment.
+    `image` may be a file path, a PIL image or an RGB numpy array.
+    Pass a dict as `timings` to collect seconds spent per stage
+    (detector_s, caption_s, ce_s) and the number of crops verified.
 
     Returns:
         detected (bool): True if at least one detection passed CE filter.
-        filtered_output (list): List of dicts {box, label, score, caption}.
+        filtered_output (list): List of dicts {box, label, score, caption, ce_score}.
+    """
+    return detect_batch([image], text_labels, threshold, text_threshold,
+                        allowed_keywords, ce_threshold, pad_pct, timings)[0]
+
+
+def detect_batch(images,
+                 text_labels: List[str],
+                 threshold: float = 0.35,
+                 text_threshold: float = 0.3,
+                 allowed_keywords: List[str] = None,
+                 ce_threshold: float = 0.05,
+                 pad_pct: float = 0.2,
+                 timings: Dict = None):
+    """
+    detect_objects for several frames (e.g. the headings of a waypoint). The
+    candidate boxes of all frames are captioned in one BLIP batch and scored
+    in one cross-encoder call. Returns one (detected, filtered_output) per frame.
     """
     if allowed_keywords is None:
         allowed_keywords = text_labels  # fallback: only use given labels
 
-    image = Image.open(image_path).convert("RGB")
-    w, h = image.size
-
-    # ===== Run GroundingDINO =====
-    inputs = dino_processor(images=image, text=text_labels, return_tensors="pt").to(device)
-    with torch.no_grad():
-        outputs = dino_model(**inputs)
-    results = dino_processor.post_process_grounded_object_detection(
-        outputs,
-        inputs.input_ids,
-        box_threshold=threshold,
-        text_threshold=text_threshold,
-        target_sizes=[(h, w)]
-    )[0]
-
-    boxes = tolist(results.get("boxes", []))
-    labels = results.get("labels", [])
-    scores = tolist(results.get("scores", []))
-
-    filtered_output = []
-
-    # ===== Filter detections =====
-    for box, label, score in zip(boxes, labels, scores):
-        if not any(keyword in label.lower() for keyword in allowed_keywords):
-            continue
-
-        # Expand crop for BLIP caption
-        x1, y1, x2, y2 = map(int, box)
-        bw, bh = x2 - x1, y2 - y1
-        px, py = int(bw * pad_pct), int(bh * pad_pct)
-        nx1, ny1 = max(0, x1 - px), max(0, y1 - py)
-        nx2, ny2 = min(w, x2 + px), min(h, y2 + py)
-        crop = image.crop((nx1, ny1, nx2, ny2))
-
-        # Caption & CE Alignment
-        caption = generate_caption(crop)
-        aligned, ce_score = check_alignment(label, caption, ce_threshold)
-
-        if aligned:
-            filtered_output.append({
-                "box": [x1, y1, x2, y2],
-                "label": label,
-                "score": float(score),
-                "caption": caption,
-                "ce_score": float(ce_score)
-            })
+    candidates = []
+    for index, image in enumerate(images):
+        for candidate in propose(load_rgb_image(image), text_labels, threshold, text_threshold,
+                                 allowed_keywords, pad_pct, timings):
+            candidates.append({**candidate, "frame": index})
 
-    detected = len(filtered_output) > 0
-    return detected, filtered_output
+    per_frame = [[] for _ in images]
+    for detection in verify_candidates(candidates, ce_threshold, timings):
+        per_frame[detection.pop("frame")].append(detection)
+    return [(len(output) > 0, output) for output in per_frame]
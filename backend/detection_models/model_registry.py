@@ -0,0 +1,290 @@
+import gc
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict
+
+import torch
+
+from config import Config
+
+# ===== Device setup =====
+device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+
+BLIP_MODEL_ID = "Salesforce/blip-image-captioning-base"
+CROSS_ENCODER_MODEL_ID = "cross-encoder/stsb-roberta-base"
+
+
+def estimate_bytes(obj, _seen=None) -> int:
+    """
+    Resident size of the torch weights reachable from `obj`: parameters and
+    buffers of any nn.Module found directly, inside tuples/lists/dicts, or
+    behind a `.model`/`.models` attribute (CrossEncoder, YOLO, YoloEnsemble).
+    """
+    _seen = set() if _seen is None else _seen
+    if obj is None or id(obj) in _seen:
+        return 0
+    _seen.add(id(obj))
+    if isinstance(obj, torch.nn.Module):
+        tensors = list(obj.parameters()) + list(obj.buffers())
+        return sum(t.numel() * t.element_size() for t in tensors)
+    if isinstance(obj, (tuple, list)):
+        return sum(estimate_bytes(item, _seen) for item in obj)
+    if isinstance(obj, dict):
+        return sum(estimate_bytes(item, _seen) for item in obj.values())
+    return sum(estimate_bytes(getattr(obj, attr, None), _seen) for attr in ("model", "models"))
+
+
+class ModelRegistry:
+    """
+    Process-wide, lazily populated store of the models the detectors share.
+
+    Each model is registered under a name with a loader and is only loaded
+    the first time someone asks for it, so BLIP and the cross-encoder exist
+    once no matter how many detectors use them. When the estimated weight
+    memory of everything loaded exceeds `memory_budget_bytes`, the least
+    recently used models that are not currently in use are unloaded; they
+    are loaded again on their next use.
+
+    Use `with registry.use(name) as model:` around inference so the model
+    cannot be unloaded while it runs. warm_up(name) loads a model and runs its
+    dummy forward pass so the first real request does not pay for either.
+    """
+
+    def __init__(self, memory_budget_bytes: int = 0):
+        self.memory_budget_bytes = memory_budget_bytes
+        self._loaders: Dict[str, Callable] = {}
+        self._warmups: Dict[str, Callable] = {}
+        self._entries: Dict[str, dict] = {}
+        self._loading = set()
+        self._errors: Dict[str, str] = {}
+        self._lock = threading.RLock()
+        self._load_locks: Dict[str, threading.Lock] = {}
+
+    def register(self, name: str, loader: Callable, warmup: Callable = None):
+        self._loaders[name] = loader
+        self._load_locks[name] = threading.Lock()
+        if warmup:
+            self._warmups[name] = warmup
+
+    def is_loaded(self, name: str) -> bool:
+        return name in self._entries
+
+    def get(self, name: str):
+        """Return the model, loading it first if needed."""
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry:
+                entry["last_used"] = time.time()
+                return entry["model"]
+        if name not in self._loaders:
+            raise KeyError(f"Unknown model: {name}")
+
+        # Load outside the registry lock so other models stay usable meanwhile
+        with self._load_locks[name]:
+            with self._lock:
+                entry = self._entries.get(name)
+            if entry is None:
+                print(f"Loading model '{name}'...")
+                start = time.perf_counter()
+                self._loading.add(name)
+                try:
+                    model = self._loaders[name]()
+                except Exception as e:
+                    self._errors[name] = str(e)
+                    raise
+                finally:
+                    self._loading.discard(name)
+                self._errors.pop(name, None)
+                entry = {
+                    "model": model, "bytes": estimate_bytes(model), "last_used": time.time(), "in_use": 0,
+                    "load_seconds": time.perf_counter() - start,
+                }
+                with self._lock:
+                    self._entries[name] = entry
+                print(f"✅ Model '{name}' loaded in {entry['load_seconds']:.1f}s ({entry['bytes'] / 1024 ** 2:.0f} MB)")
+                self._enforce_budget(keep=name)
+        entry["last_used"] = time.time()
+        return entry["model"]
+
+    @contextmanager
+    def use(self, name: str):
+        """Context manager yielding the model and pinning it against unloading meanwhile."""
+        while True:
+            model = self.get(name)
+            with self._lock:
+                entry = self._entries.get(name)
+                # Another thread may have unloaded it between get() and here
+                if entry is not None and entry["model"] is model:
+                    entry["in_use"] += 1
+                    break
+        try:
+            yield model
+        finally:
+            with self._lock:
+                entry["in_use"] -= 1
+                entry["last_used"] = time.time()
+
+    def warm_up(self, name: str):
+        """Load `name` and run its dummy forward pass, if it registered one."""
+        start = time.perf_counter()
+        with self.use(name) as model:
+            if name in self._warmups:
+                with torch.no_grad():
+                    self._warmups[name](model)
+        print(f"🔥 Model '{name}' warmed up in {time.perf_counter() - start:.1f}s")
+
+    def state(self, name: str) -> str:
+        if name in self._entries:
+            return "loaded"
+        if name in self._loading:
+            return "loading"
+        if name in self._errors:
+            return "failed"
+        return "not_loaded"
+
+    def unload(self, name: str) -> bool:
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is None or entry["in_use"]:
+                return False
+            del self._entries[name]
+        del entry
+        gc.collect()
+        if torch.cuda.is_available():
+            torch.cuda.empty_cache()
+        print(f"Unloaded model '{name}'")
+        return True
+
+    def total_bytes(self) -> int:
+        with self._lock:
+            return sum(entry["bytes"] for entry in self._entries.values())
+
+    def _enforce_budget(self, keep: str):
+        if not self.memory_budget_bytes:
+            return
+        while self.total_bytes() > self.memory_budget_bytes:
+            with self._lock:
+                idle = [
+                    (entry["last_used"], name) for name, entry in self._entries.items()
+                    if name != keep and not entry["in_use"]
+                ]
+            if not idle:
+                print(
+                    f"[MODEL REGISTRY] {self.total_bytes() / 1024 ** 2:.0f} MB loaded exceeds the "
+                    f"{self.memory_budget_bytes / 1024 ** 2:.0f} MB budget and nothing idle can be unloaded"
+                )
+                return
+            self.unload(min(idle)[1])
+
+    def report(self) -> dict:
+        """What is registered, what is loaded and how much weight memory it holds."""
+        with self._lock:
+            models = {
+                name: {
+                    "state": self.state(name),
+                    "error": self._errors.get(name),
+                    "loaded": name in self._entries,
+                    "mb": round(self._entries[name]["bytes"] / 1024 ** 2, 1) if name in self._entries else 0,
+                    "in_use": self._entries[name]["in_use"] if name in self._entries else 0,
+                    "idle_seconds": round(time.time() - self._entries[name]["last_used"], 1) if name in self._entries else None,
+                    "load_seconds": round(self._entries[name]["load_seconds"], 1) if name in self._entries else None,
+                }
+                for name in self._loaders
+            }
+        return {
+            "device": str(device),
+            "total_mb": round(self.total_bytes() / 1024 ** 2, 1),
+            "budget_mb": round(self.memory_budget_bytes / 1024 ** 2, 1) if self.memory_budget_bytes else None,
+            "models": models,
+        }
+
+
+# ===== Loaders =====
+def _load_grounding_dino():
+    from transformers import AutoProcessor, AutoModelForZeroShotObjectDetection
+    from detection_models.prompt_cache import cache_text_backbone
+    model_id = "IDEA-Research/grounding-dino-base"
+    processor = AutoProcessor.from_pretrained(model_id, use_fast=True)
+    model = AutoModelForZeroShotObjectDetection.from_pretrained(model_id).to(device)
+    model.eval()
+    cache_text_backbone(model)
+    return processor, model
+
+
+def _load_owlvit():
+    from transformers import OwlViTProcessor, OwlViTForObjectDetection
+    model_id = "google/owlvit-base-patch32"
+    processor = OwlViTProcessor.from_pretrained(model_id)
+    model = OwlViTForObjectDetection.from_pretrained(model_id).to(device)
+    model.eval()
+    return processor, model
+
+
+def _load_blip():
+    from transformers import BlipProcessor, BlipForConditionalGeneration
+    processor = BlipProcessor.from_pretrained(BLIP_MODEL_ID, use_fast=True)
+    model = BlipForConditionalGeneration.from_pretrained(BLIP_MODEL_ID).to(device)
+    model.eval()
+    return processor, model
+
+
+def _load_cross_encoder():
+    from sentence_transformers import CrossEncoder
+    return CrossEncoder(CROSS_ENCODER_MODEL_ID)
+
+
+def _load_yolo():
+    from detection_models.yolo_ensemble import YoloEnsemble
+    ensemble = YoloEnsemble(backend=Config.YOLO_BACKEND, int8=Config.YOLO_INT8)
+    ensemble.load()
+    return ensemble
+
+
+# ===== Warmups (one dummy forward pass on a blank frame) =====
+def _blank_image(size=640):
+    from PIL import Image
+    return Image.new("RGB", (size, size), (128, 128, 128))
+
+
+def _warm_up_grounding_dino(model):
+    processor, dino_model = model
+    inputs = processor(images=_blank_image(), text=["a tent."], return_tensors="pt").to(device)
+    dino_model(**inputs)
+
+
+def _warm_up_owlvit(model):
+    processor, owlvit_model = model
+    inputs = processor(text=["a tent"], images=_blank_image(), return_tensors="pt").to(device)
+    owlvit_model(**inputs)
+
+
+def _warm_up_blip(model):
+    processor, blip_model = model
+    inputs = processor(images=_blank_image(64), return_tensors="pt").to(device)
+    blip_model.generate(**inputs, max_new_tokens=5)
+
+
+def _warm_up_cross_encoder(model):
+    model.predict([("a tent on the sidewalk", "a tent")])
+
+
+def _warm_up_yolo(model):
+    model.detect_batch([_blank_image()])
+
+
+# ===== Shared Instance =====
+registry = ModelRegistry(int(Config.MODEL_MEMORY_BUDGET_MB * 1024 ** 2))
+registry.register("grounding_dino", _load_grounding_dino, _warm_up_grounding_dino)
+registry.register("owlvit", _load_owlvit, _warm_up_owlvit)
+registry.register("blip", _load_blip, _warm_up_blip)
+registry.register("cross_encoder", _load_cross_encoder, _warm_up_cross_encoder)
+registry.register("yolo", _load_yolo, _warm_up_yolo)
+
+# Models each stream model option needs, used for warmup and readiness
+STREAM_MODEL_DEPENDENCIES = {
+    "dino": ["grounding_dino", "blip", "cross_encoder"],
+    "owlvit": ["owlvit", "blip", "cross_encoder"],
+    "yolo": ["yolo"],
+    "cascade": ["yolo", "grounding_dino", "blip", "cross_encoder"],
+}
@@ -1,71 +1,51 @@
-import os
+import time
 import torch
 from PIL import Image
-from typing import List
-from transformers import (
-    OwlViTProcessor, OwlViTForObjectDetection,
-    BlipProcessor, BlipForConditionalGeneration
-)
-from sentence_transformers import CrossEncoder
+from typing import Dict, List
 from config import Config
-
-# ===== Device Setup =====
-device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-
-# ===== Load OWL-ViT =====
-owlvit_model_id = "google/owlvit-base-patch32"
-processor = OwlViTProcessor.from_pretrained(owlvit_model_id)
-model = OwlViTForObjectDetection.from_pretrained(owlvit_model_id).to(device)
-model.eval()
-
-# ===== Load BLIP (Captioning) =====
-blip_model_id = "Salesforce/blip-image-captioning-base"
-blip_processor = BlipProcessor.from_pretrained(blip_model_id)
-blip_model = BlipForConditionalGeneration.from_pretrained(blip_model_id).to(device)
-blip_model.eval()
-
-# ===== Load Cross-Encoder (Semantic Similarity) =====
-ce_model_id = "cross-encoder/stsb-roberta-base"
-cross_encoder = CrossEncoder(ce_model_id)
-
-
-# ===== Helper: BLIP + CE Filter =====
-def passes_ce(label: str, cropped_img: Image.Image, threshold: float = 0.3) -> bool:
-    inputs = blip_processor(images=cropped_img, return_tensors="pt").to(device)
-    ids = blip_model.generate(**inputs)
-    caption = blip_processor.decode(ids[0], skip_special_tokens=True)
-    score = cross_encoder.predict([(label, caption)])[0]
-    print(f"  → BLIP Caption: \"{caption}\" | CE Score: {score:.2f}")
-    return score >= threshold
-
-
-# ===== Main Detection Function =====
-def detect_objects(
-    image_path: str,
-    text_labels: List[str],
-    threshold: float = 0.1,
-    ce_threshold: float = 0.02,
-    allowed_keywords: List[str] = Config.ALLOWED_KEYWORDS,
-    pad_pct: float = 0.2,
-):
-    image = Image.open(image_path).convert("RGB")
-    inputs = processor(text=text_labels, images=image, return_tensors="pt").to(device)
-
-    with torch.no_grad():
-        outputs = model(**inputs)
-
-    target_sizes = torch.tensor([image.size[::-1]]).to(device)
-    results = processor.post_process_object_detection(
-        outputs=outputs,
-        target_sizes=target_sizes,
-        threshold=threshold
-    )[0]
+from detection_models.model_registry import registry, device
+from detection_models.caption_verifier import crop_with_padding, verify_candidates
+from detection_models.prompt_cache import prompt_cache, encode_owlvit_queries, owlvit_detect_with_queries
+from utils.image_utils import load_rgb_image
+from utils.timings import add_timing, timed
+
+# ===== Models =====
+# OWL-ViT, BLIP (captioning) and the cross-encoder (semantic similarity) are
+# loaded on first use by the shared model registry; BLIP and the
+# cross-encoder are shared with GroundingDINO.
+
+
+# ===== Helper: OWL-ViT proposals =====
+def propose(image: Image.Image, text_labels: List[str], threshold: float,
+            allowed_keywords: List[str], pad_pct: float, timings: Dict = None) -> List[Dict]:
+    """Run OWL-ViT on one RGB PIL image and return keyword-filtered candidates with their crops."""
+    start = time.perf_counter()
+    with registry.use("owlvit") as (processor, model):
+        with timed(timings, "preprocess_s"):
+            # Query embeddings depend only on the labels: encode them once per label set
+            query_embeds, query_mask = prompt_cache.get_or_compute(
+                ("owlvit", id(model), tuple(text_labels)),
+                lambda: encode_owlvit_queries(processor, model, text_labels, device),
+            )
+            pixel_values = processor(images=image, return_tensors="pt")["pixel_values"].to(device)
+
+        with timed(timings, "forward_s"), torch.no_grad():
+            outputs = owlvit_detect_with_queries(model, pixel_values, query_embeds, query_mask)
+
+        with timed(timings, "postprocess_s"):
+            target_sizes = torch.tensor([image.size[::-1]]).to(device)
+            results = processor.post_process_object_detection(
+                outputs=outputs,
+                target_sizes=target_sizes,
+                threshold=threshold
+            )[0]
+    add_timing(timings, "detector_s", time.perf_counter() - start)
 
     boxes = results["boxes"]
     scores = results["scores"]
     label_indices = results["labels"]
 
-    filtered_output = []
+    candidates = []
 
     for box, score, label_idx in zip(boxes, scores, label_indices):
         try:
@@ -82,30 +62,51 @@ def detect_objects(
                 print(f"  Skipped: '{label_text}' not in allowed keywords.")
                 continue
 
-        # Crop the image around the detection box with padding
-        img_w, img_h = image.size
+        # Crop the image around the detection box with padding, for BLIP + CE
         x1, y1, x2, y2 = map(int, box.tolist())
-        bw, bh = x2 - x1, y2 - y1
-        px, py = int(bw * pad_pct), int(bh * pad_pct)
+        candidates.append({
+            "box": [x1, y1, x2, y2],
+            "label": label_text,
+            "score": float(score),
+            "crop": crop_with_padding(image, (x1, y1, x2, y2), pad_pct),
+        })
 
-        # Clamp padded coordinates within image bounds
-        nx1 = max(0, x1 - px)
-        ny1 = max(0, y1 - py)
-        nx2 = min(img_w, x2 + px)
-        ny2 = min(img_h, y2 + py)
+    return candidates
 
-        crop = image.crop((nx1, ny1, nx2, ny2))
 
-        # BLIP + CE filter
-        if not passes_ce(label_text, crop, threshold=ce_threshold):
-            print(f"  Discarded by CE: {label_text}")
-            continue
+# ===== Main Detection Function =====
+def detect_objects(
+    image,
+    text_labels: List[str],
+    threshold: float = 0.1,
+    ce_threshold: float = 0.02,
+    allowed_keywords: List[str] = Config.ALLOWED_KEYWORDS,
+    pad_pct: float = 0.2,
+    timings: Dict = None,
+):
+    return detect_batch([image], text_labels, threshold, ce_threshold, allowed_keywords, pad_pct, timings)[0]
 
-        filtered_output.append({
-            "box": [x1, y1, x2, y2],
-            "label": label_text,
-            "score": float(score)
-        })
 
-    detected = len(filtered_output) > 0
-    return detected, filtered_output
+def detect_batch(
+    images,
+    text_labels: List[str],
+    threshold: float = 0.1,
+    ce_threshold: float = 0.02,
+    allowed_keywords: List[str] = Config.ALLOWED_KEYWORDS,
+    pad_pct: float = 0.2,
+    timings: Dict = None,
+):
+    """
+    detect_objects for several frames: candidates of all frames are captioned
+    in one BLIP batch and scored in one cross-encoder call. Pass a dict as
+    `timings` to collect per-stage seconds. Returns one (detected, output) per frame.
+    """
+    candidates = []
+    for index, image in enumerate(images):
+        for candidate in propose(load_rgb_image(image), text_labels, threshold, allowed_keywords, pad_pct, timings):
+            candidates.append({**candidate, "frame": index})
+
+    per_frame = [[] for _ in images]
+    for detection in verify_candidates(candidates, ce_threshold, timings):
+        per_frame[detection.pop("frame")].append(detection)
+    return [(len(output) > 0, output) for output in per_frame]
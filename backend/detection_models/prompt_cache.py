@@ -0,0 +1,140 @@
+import threading
+from collections import OrderedDict
+
+import torch
+
+
+class PromptCache:
+    """
+    LRU of text-side prompt encodings (tokenized prompts, text embeddings).
+
+    Keys include the model instance and the label tuple, so a changed label
+    set or a reloaded model simply misses and computes fresh encodings;
+    clear() drops everything explicitly.
+    """
+
+    def __init__(self, max_entries=16):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, key, compute):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+        value = compute()
+        with self._lock:
+            self.misses += 1
+            self._entries[key] = value
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hits / total if total else 0.0}
+
+
+prompt_cache = PromptCache()
+
+
+def _tensor_key(value):
+    if isinstance(value, torch.Tensor):
+        return (tuple(value.shape), str(value.dtype), value.detach().cpu().numpy().tobytes())
+    return value
+
+
+# Same behaviour as model_pipelines/feature_cache.py (kept separate: the pipelines do not import the backend)
+class CachedTextBackbone(torch.nn.Module):
+    """
+    Drop-in wrapper around Grounding DINO's BERT text backbone that returns
+    the stored output when it sees the exact same token tensors again. With a
+    constant label set the prompt is encoded once and every later image only
+    runs the vision side and the fusion layers.
+    """
+
+    def __init__(self, backbone, max_entries=16):
+        super().__init__()
+        self.backbone = backbone
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._outputs = OrderedDict()
+
+    def forward(self, *args, **kwargs):
+        if torch.is_grad_enabled():
+            return self.backbone(*args, **kwargs)
+        key = (
+            tuple(_tensor_key(arg) for arg in args),
+            tuple(sorted((name, _tensor_key(value)) for name, value in kwargs.items())),
+        )
+        if key in self._outputs:
+            self._outputs.move_to_end(key)
+            self.hits += 1
+            return self._outputs[key]
+        output = self.backbone(*args, **kwargs)
+        self.misses += 1
+        self._outputs[key] = output
+        while len(self._outputs) > self.max_entries:
+            self._outputs.popitem(last=False)
+        return output
+
+    def clear(self):
+        self._outputs.clear()
+
+
+def cache_text_backbone(dino_model, max_entries=16):
+    """
+    Wrap the text backbone of a Grounding DINO model once; returns the
+    wrapper. Calling it again with a larger `max_entries` raises the bound.
+    """
+    inner = dino_model.model
+    if not isinstance(inner.text_backbone, CachedTextBackbone):
+        inner.text_backbone = CachedTextBackbone(inner.text_backbone, max_entries)
+    inner.text_backbone.max_entries = max(inner.text_backbone.max_entries, max_entries)
+    return inner.text_backbone
+
+
+def encode_owlvit_queries(processor, model, text_labels, device):
+    """
+    Text side of OWL-ViT for one label set: projected query embeddings
+    (1, Q, D) and the query mask (1, Q), computed once and reused per image.
+    """
+    text_inputs = processor(text=text_labels, return_tensors="pt").to(device)
+    with torch.no_grad():
+        query_embeds = model.owlvit.get_text_features(
+            input_ids=text_inputs["input_ids"], attention_mask=text_inputs["attention_mask"]
+        )
+    query_mask = text_inputs["input_ids"][:, 0] > 0
+    return query_embeds.unsqueeze(0), query_mask.unsqueeze(0)
+
+
+def owlvit_detect_with_queries(model, pixel_values, query_embeds, query_mask):
+    """
+    OWL-ViT detection head on precomputed query embeddings: the same steps as
+    OwlViTForObjectDetection.forward minus the text encoder. Returns an
+    output with `logits` and `pred_boxes` for post_process_object_detection.
+    """
+    from transformers.models.owlvit.modeling_owlvit import OwlViTObjectDetectionOutput
+
+    feature_map = model.image_embedder(pixel_values=pixel_values)[0]
+    batch_size, height, width, dim = feature_map.shape
+    image_feats = feature_map.reshape(batch_size, height * width, dim)
+    query_embeds = query_embeds.expand(batch_size, -1, -1)
+    query_mask = query_mask.expand(batch_size, -1)
+    pred_logits, class_embeds = model.class_predictor(image_feats, query_embeds, query_mask)
+    pred_boxes = model.box_predictor(image_feats, feature_map)
+    return OwlViTObjectDetectionOutput(
+        logits=pred_logits,
+        pred_boxes=pred_boxes,
+        image_embeds=feature_map,
+        class_embeds=class_embeds,
+    )
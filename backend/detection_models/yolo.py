@@ -1,6 +1,3 @@
-from ultralytics import YOLO
-import torch
-from PIL import Image
 from typing import List
 import sys
 import os
@@ -9,21 +6,13 @@ from dotenv import load_dotenv
 # Add the parent directory to the Python path to import config
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from config import Config
+from detection_models.model_registry import registry
 
 # Load environment variables
 load_dotenv()
 
-# Load all three models with their specific paths
-GRAFFITI_MODEL_PATH = "models/graffiti.pt"
-TENT_MODEL_PATH = "models/homeless.pt"  # Note: using homeless.pt for tent detection
-ROAD_DAMAGE_MODEL_PATH = "models/road damage.pt"
-
-# Initialize models
-print("Loading YOLO models...")
-graffiti_model = YOLO(GRAFFITI_MODEL_PATH)
-tent_model = YOLO(TENT_MODEL_PATH)
-road_damage_model = YOLO(ROAD_DAMAGE_MODEL_PATH)
-print("Finished loading YOLO models")
+# The three models (graffiti, homeless.pt for tents, road damage) are loaded
+# on first use through the model registry, shared with combined_yolos
 
 def map_detection_to_label(model_name: str, confidence: float) -> str:
     """
@@ -43,63 +32,36 @@ def map_detection_to_label(model_name: str, confidence: float) -> str:
         return model_name
 
 def detect_objects(
-    image_path: str,
+    image,
     text_labels: List[str],  # Kept for consistency with other models
     threshold: float = 0.5,
-    allowed_keywords: List[str] = Config.ALLOWED_KEYWORDS
+    allowed_keywords: List[str] = Config.ALLOWED_KEYWORDS,
+    timings: dict = None
 ):
     """
     Run all three YOLO models on the image and combine their results.
     Each model detects one specific type of object.
+    `image` may be a file path, a PIL image or an RGB numpy array.
+    """
+    return detect_batch([image], text_labels, threshold, allowed_keywords, timings)[0]
+
+
+def detect_batch(
+    frames,
+    text_labels: List[str],  # Kept for consistency with other models
+    threshold: float = 0.5,
+    allowed_keywords: List[str] = Config.ALLOWED_KEYWORDS,
+    timings: dict = None
+):
+    """
+    Batched detect_objects: every frame is decoded and letterboxed once and
+    each model runs once over the whole batch. Returns one
+    (detected, detections) tuple per frame.
     """
-    print(f"\nProcessing image: {image_path}")
-    filtered_output = []
-    
-    # Run inference with graffiti model
-    print("\nRunning graffiti model...")
-    graffiti_results = graffiti_model(image_path)[0]
-    for box in graffiti_results.boxes:
-        if box.conf[0] >= threshold:
-            cls_id = int(box.cls[0])
-            label = graffiti_results.names[cls_id]
-            print(f"Graffiti model detected: {label} with confidence {box.conf[0]:.2f}")
-            mapped_label = map_detection_to_label("graffiti", box.conf[0])
-            filtered_output.append({
-                "box": box.xyxy[0].tolist(),
-                "label": mapped_label,
-                "score": float(box.conf[0])
-            })
-    
-    # Run inference with tent model
-    print("\nRunning tent model...")
-    tent_results = tent_model(image_path)[0]
-    for box in tent_results.boxes:
-        if box.conf[0] >= threshold:
-            cls_id = int(box.cls[0])
-            label = tent_results.names[cls_id]
-            print(f"Tent model detected: {label} with confidence {box.conf[0]:.2f}")
-            mapped_label = map_detection_to_label("homeless", box.conf[0])
-            filtered_output.append({
-                "box": box.xyxy[0].tolist(),
-                "label": mapped_label,
-                "score": float(box.conf[0])
-            })
-    
-    # Run inference with road damage model
-    print("\nRunning road damage model...")
-    road_damage_results = road_damage_model(image_path)[0]
-    for box in road_damage_results.boxes:
-        if box.conf[0] >= threshold:
-            cls_id = int(box.cls[0])
-            label = road_damage_results.names[cls_id]
-            print(f"Road damage model detected: {label} with confidence {box.conf[0]:.2f}")
-            mapped_label = map_detection_to_label("road damage", box.conf[0])
-            filtered_output.append({
-                "box": box.xyxy[0].tolist(),
-                "label": mapped_label,
-                "score": float(box.conf[0])
-            })
-    
-    detected = len(filtered_output) > 0
-    print(f"\nTotal detections: {len(filtered_output)}")
-    return detected, filtered_output
+    with registry.use("yolo") as ensemble:
+        results = ensemble.detect_batch(
+            frames, threshold,
+            label_fn=lambda model_name, class_name, score: map_detection_to_label(model_name, score),
+            timings=timings
+        )
+    return results
@@ -0,0 +1,155 @@
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+import torch
+from ultralytics import YOLO
+
+from detection_models.yolo_export import ensure_exported
+from utils.image_utils import load_rgb_image
+from utils.timings import add_timing, timed
+
+# ===== Configuration =====
+YOLO_MODEL_PATHS = {
+    "road damage": "./models/road damage.pt",
+    "homeless":    "./models/homeless.pt",
+    "graffiti":    "./models/graffiti.pt"
+}
+YOLO_IMAGE_SIZE = 640
+LETTERBOX_FILL = 114
+
+
+def letterbox(image: np.ndarray, size: int = YOLO_IMAGE_SIZE) -> Tuple[np.ndarray, float, Tuple[int, int]]:
+    """
+    Resize an RGB array to fit a size x size square keeping its aspect ratio
+    and pad the rest, like ultralytics does. Returns (square image, scale,
+    (pad_x, pad_y)) so boxes can be mapped back to the original frame.
+    """
+    height, width = image.shape[:2]
+    scale = min(size / height, size / width)
+    new_w, new_h = round(width * scale), round(height * scale)
+    if (new_w, new_h) != (width, height):
+        image = cv2.resize(image, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+    pad_x, pad_y = (size - new_w) // 2, (size - new_h) // 2
+    if (new_w, new_h) == (size, size):
+        return image, scale, (0, 0)
+    canvas = np.full((size, size, 3), LETTERBOX_FILL, dtype=np.uint8)
+    canvas[pad_y:pad_y + new_h, pad_x:pad_x + new_w] = image
+    return canvas, scale, (pad_x, pad_y)
+
+
+class YoloEnsemble:
+    """
+    Runs every registered YOLO model over the same batch of frames.
+
+    Frames are decoded and letterboxed once into a single (N, 3, H, W)
+    tensor that all models share, instead of each model re-reading and
+    re-resizing its own copy. Boxes come back as arrays and are filtered and
+    mapped to frame coordinates with vectorized numpy ops.
+
+    `label_fn(model_name, class_name, score)` turns a model's class name and
+    the box's confidence into the label reported to callers; by default the
+    class name is used as is.
+    Models are loaded on first use, or up front with load().
+
+    `backend` selects eager PyTorch ("pytorch") or an exported ONNX Runtime /
+    OpenVINO artifact cached next to the .pt file (see yolo_export).
+    """
+
+    def __init__(self, model_paths: Dict[str, str] = YOLO_MODEL_PATHS, device=None,
+                 image_size: int = YOLO_IMAGE_SIZE, backend: str = "pytorch", int8: bool = False):
+        self.model_paths = dict(model_paths)
+        self.device = device or torch.device("cuda" if torch.cuda.is_available() else "cpu")
+        self.image_size = image_size
+        self.backend = backend
+        self.int8 = int8
+        self.models: Dict[str, YOLO] = {}
+        self._lock = threading.Lock()
+
+    def load(self):
+        with self._lock:
+            if not self.models:
+                print(f"Loading YOLO models ({self.backend}{', int8' if self.int8 else ''})...")
+                for name, path in self.model_paths.items():
+                    if self.backend == "pytorch":
+                        model = YOLO(path)
+                        model.to(self.device)
+                    else:
+                        # Exported models carry no task metadata ultralytics can rely on
+                        model = YOLO(ensure_exported(path, self.backend, self.int8, self.image_size), task="detect")
+                    self.models[name] = model
+                print(f"YOLO Models loaded: {', '.join(self.models.keys())}")
+        return self.models
+
+    def preprocess(self, frames) -> Tuple[torch.Tensor, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Decode and letterbox every frame once. Returns the batch tensor plus
+        per-frame scales (N,), pads (N, 2) and original sizes (N, 2) as (w, h).
+        """
+        squares, scales, pads, sizes = [], [], [], []
+        for frame in frames:
+            image = np.asarray(load_rgb_image(frame))
+            square, scale, pad = letterbox(image, self.image_size)
+            squares.append(square)
+            scales.append(scale)
+            pads.append(pad)
+            sizes.append((image.shape[1], image.shape[0]))
+        batch = torch.from_numpy(np.ascontiguousarray(np.stack(squares).transpose(0, 3, 1, 2)))
+        batch = batch.to(self.device).float().div_(255.0)
+        return batch, np.array(scales, dtype=np.float32), np.array(pads, dtype=np.float32), np.array(sizes, dtype=np.float32)
+
+    def detect_batch(self, frames, threshold: float = 0.25,
+                     label_fn: Optional[Callable[[str, str, float], str]] = None,
+                     timings: Optional[Dict] = None) -> List[Tuple[bool, List[Dict]]]:
+        """
+        Run all models on `frames` (paths, PIL images or RGB arrays) and return
+        one (detected, detections) tuple per frame, in the same format as the
+        detectors' detect_objects(). Pass a dict as `timings` to collect
+        preprocess_s, forward_s and postprocess_s.
+        """
+        if not frames:
+            return []
+        models = self.models or self.load()
+        with timed(timings, "preprocess_s"):
+            batch, scales, pads, sizes = self.preprocess(frames)
+
+        per_frame = [[] for _ in frames]
+        for model_name, model in models.items():
+            with timed(timings, "forward_s"):
+                results = model.predict(batch, conf=threshold, verbose=False)
+            start = time.perf_counter()
+            names = model.names
+            for index, result in enumerate(results):
+                if result.boxes is None or len(result.boxes) == 0:
+                    continue
+                boxes = result.boxes.xyxy.cpu().numpy()
+                scores = result.boxes.conf.cpu().numpy()
+                classes = result.boxes.cls.cpu().numpy().astype(int)
+
+                keep = scores >= threshold
+                if not keep.any():
+                    continue
+                boxes, scores, classes = boxes[keep], scores[keep], classes[keep]
+                # Undo the letterbox in one go: remove padding, rescale, clip to the frame
+                boxes = (boxes - np.tile(pads[index], 2)) / scales[index]
+                boxes = np.clip(boxes, 0, np.tile(sizes[index], 2)).astype(int)
+
+                for box, score, cls in zip(boxes.tolist(), scores.tolist(), classes.tolist()):
+                    class_name = names[cls]
+                    per_frame[index].append({
+                        "box": box,
+                        "label": label_fn(model_name, class_name, score) if label_fn else class_name,
+                        "score": score
+                    })
+            add_timing(timings, "postprocess_s", time.perf_counter() - start)
+
+        return [(len(detections) > 0, detections) for detections in per_frame]
+
+
+# ===== Shared Instance =====
+def get_ensemble() -> YoloEnsemble:
+    """Process-wide ensemble shared by combined_yolos and yolo, loaded on first use through the model registry."""
+    from detection_models.model_registry import registry
+    return registry.get("yolo")
@@ -0,0 +1,86 @@
+"""
+Export the YOLO .pt weights to CPU-friendly backends and cache the result
+next to the originals.
+
+    models/graffiti.pt -> models/graffiti.onnx                 (onnx)
+                       -> models/graffiti.int8.onnx            (onnx, int8)
+                       -> models/graffiti_openvino_model/      (openvino)
+                       -> models/graffiti_int8_openvino_model/ (openvino, int8)
+
+An export is redone when the .pt file is newer than the cached artifact.
+Exports use a dynamic batch axis so the ensemble can run a waypoint's
+frames as one batch.
+
+Run from backend/ to export everything ahead of time:
+    python -m detection_models.yolo_export --backend onnx [--int8]
+"""
+import argparse
+import os
+import shutil
+
+from ultralytics import YOLO
+
+BACKENDS = ("pytorch", "onnx", "openvino")
+
+
+def export_path(pt_path: str, backend: str, int8: bool = False) -> str:
+    """Where the exported artifact of `pt_path` lives (it may not exist yet)."""
+    stem, _ = os.path.splitext(pt_path)
+    if backend == "pytorch":
+        return pt_path
+    if backend == "onnx":
+        return f"{stem}.int8.onnx" if int8 else f"{stem}.onnx"
+    if backend == "openvino":
+        return f"{stem}_int8_openvino_model" if int8 else f"{stem}_openvino_model"
+    raise ValueError(f"Unknown YOLO backend: {backend} (expected one of {', '.join(BACKENDS)})")
+
+
+def _is_fresh(artifact: str, pt_path: str) -> bool:
+    return os.path.exists(artifact) and os.path.getmtime(artifact) >= os.path.getmtime(pt_path)
+
+
+def _quantize_onnx(fp32_path: str, int8_path: str):
+    # Dynamic INT8 quantization of the weights; activations stay float, so no calibration set is needed
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QUInt8)
+
+
+def ensure_exported(pt_path: str, backend: str, int8: bool = False, image_size: int = 640) -> str:
+    """Return the path to load for `backend`, exporting `pt_path` first if the cache is missing or stale."""
+    artifact = export_path(pt_path, backend, int8)
+    if backend == "pytorch" or _is_fresh(artifact, pt_path):
+        return artifact
+
+    print(f"Exporting {pt_path} to {backend}{' (int8)' if int8 else ''}...")
+    model = YOLO(pt_path)
+    if backend == "onnx":
+        fp32_path = export_path(pt_path, "onnx")
+        if not _is_fresh(fp32_path, pt_path):
+            exported = model.export(format="onnx", imgsz=image_size, dynamic=True, simplify=True)
+            if os.path.abspath(exported) != os.path.abspath(fp32_path):
+                shutil.move(exported, fp32_path)
+        if int8:
+            _quantize_onnx(fp32_path, artifact)
+    else:
+        exported = model.export(format="openvino", imgsz=image_size, dynamic=True, int8=int8)
+        if os.path.abspath(exported) != os.path.abspath(artifact):
+            if os.path.exists(artifact):
+                shutil.rmtree(artifact)
+            shutil.move(exported, artifact)
+    print(f"✅ Exported {artifact}")
+    return artifact
+
+
+def main():
+    from detection_models.yolo_ensemble import YOLO_MODEL_PATHS
+
+    parser = argparse.ArgumentParser(description="Export the YOLO weights to ONNX / OpenVINO.")
+    parser.add_argument("--backend", choices=BACKENDS[1:], default="onnx")
+    parser.add_argument("--int8", action="store_true", help="also quantize to INT8")
+    args = parser.parse_args()
+    for name, path in YOLO_MODEL_PATHS.items():
+        ensure_exported(path, args.backend, args.int8)
+
+
+if __name__ == "__main__":
+    main()
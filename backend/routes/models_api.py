@@ -0,0 +1,50 @@
+import sys
+from flask import Blueprint, jsonify
+from config import Config
+
+# Create a Blueprint for detection model status routes
+models_bp = Blueprint('models', __name__)
+
+REGISTRY_MODULE = "detection_models.model_registry"
+
+
+def _registry():
+    # Do not import torch just to answer a status request; until a detector
+    # has been used (or warmup started) nothing can be loaded anyway
+    module = sys.modules.get(REGISTRY_MODULE)
+    return module.registry if module else None
+
+
+@models_bp.route('/api/models', methods=['GET'])
+def get_models():
+    """Which detection models are loaded and how much weight memory they hold."""
+    registry = _registry()
+    if registry is None:
+        return jsonify({"imported": False, "total_mb": 0, "models": {}})
+    report = {"imported": True, **registry.report()}
+    verifier = sys.modules.get("detection_models.caption_verifier")
+    if verifier:
+        report["verification_caches"] = verifier.cache_stats()
+    return jsonify(report)
+
+
+@models_bp.route('/api/models/ready', methods=['GET'])
+def models_ready():
+    """
+    Readiness of each stream model option. Returns 200 once every model
+    listed in MODEL_WARMUP is loaded (immediately when none is), 503 before.
+    """
+    module = sys.modules.get(REGISTRY_MODULE)
+    streams = {}
+    for model in ("dino", "owlvit", "yolo", "cascade"):
+        if module is None:
+            streams[model] = {"ready": False, "models": {}}
+            continue
+        states = {
+            name: module.registry.state(name)
+            for name in module.STREAM_MODEL_DEPENDENCIES[model]
+        }
+        streams[model] = {"ready": all(state == "loaded" for state in states.values()), "models": states}
+
+    ready = all(streams.get(model, {}).get("ready") for model in Config.MODEL_WARMUP)
+    return jsonify({"ready": ready, "warmup": Config.MODEL_WARMUP, "streams": streams}), 200 if ready else 503
@@ -1,16 +1,26 @@
-import requests
 from dotenv import load_dotenv
+import importlib
 import os
 import time
-import cv2
+import threading
+import uuid
 import numpy as np
-from flask import request
-import boto3
+from flask import request, current_app
 
 from extensions import socketio
 from flask_socketio import emit
-from detection_models import grounding_dino, owlvit, combined_yolos
 from utils import mysql_db_utils
+from utils.stream_pipeline import Stage, StreamPipeline
+from utils.geocode_cache import GeocodeCache
+from utils.streetview_cache import StreetViewCache
+from utils.image_utils import decode_image, encode_jpeg, encode_preview, mask_watermark
+from utils.s3_uploader import S3Uploader
+from utils.maps_client import MapsClient, MAPS_ENDPOINTS
+from utils.stream_sessions import StreamSessionStore
+from utils.panoramas import resolve_panoramas
+from utils.stream_control import StreamControl
+from utils.inference_executor import InferenceExecutor
+from utils.frame_quality import FrameGate
 from datetime import datetime
 from config import Config
 
@@ -19,6 +29,47 @@ load_dotenv()
 
 text_labels = Config.LABELS
 
+PREVIEW_CONTENT_TYPES = {"jpeg": "image/jpeg", "webp": "image/webp"}
+
+EMPTY_ADDRESS = {'formatted_address': "", 'street': "", 'city': "", 'state': "", 'zipcode': ""}
+
+geocode_cache = GeocodeCache(
+    Config.GEOCODE_CACHE_PATH,
+    ttl_seconds=Config.GEOCODE_CACHE_TTL,
+    max_entries=Config.GEOCODE_CACHE_MAX_ENTRIES,
+    precision=Config.GEOCODE_CACHE_PRECISION,
+)
+
+streetview_cache = StreetViewCache(
+    Config.STREETVIEW_CACHE_DIR,
+    max_bytes=Config.STREETVIEW_CACHE_MAX_BYTES,
+    cache_only=Config.STREETVIEW_CACHE_ONLY,
+)
+
+maps_client = MapsClient(
+    os.getenv("GOOGLE_API_KEY"),
+    rate_limits={
+        "geocode": Config.MAPS_GEOCODE_QPS,
+        "streetview": Config.MAPS_STREETVIEW_QPS,
+        "streetview_metadata": Config.MAPS_METADATA_QPS,
+    },
+    max_concurrency=Config.MAPS_MAX_CONCURRENCY,
+    max_retries=Config.MAPS_MAX_RETRIES,
+)
+
+# Model calls run on native threads so they do not block the gevent hub
+inference_executor = InferenceExecutor(max_workers=Config.INFERENCE_WORKERS)
+
+session_store = StreamSessionStore(Config.STREAM_SESSION_DB_PATH)
+
+s3_uploader = S3Uploader(
+    os.getenv("S3_BUCKET_NAME"),
+    max_workers=Config.S3_UPLOAD_WORKERS,
+    max_retries=Config.S3_UPLOAD_RETRIES,
+    backoff=Config.S3_UPLOAD_BACKOFF,
+    endpoint_url=Config.S3_ENDPOINT_URL,
+)
+
 
 def generate_coordinates(startLat, startLng, endLat, endLng, num_points):
     """Generate evenly spaced coordinates between start and end points, rounded to 6 decimal places."""
@@ -27,229 +78,523 @@ def generate_coordinates(startLat, startLng, endLat, endLng, num_points):
     return [(round(lat, 6), round(lng, 6)) for lat, lng in zip(latitudes, longitudes)]
 
 
-def upload_file_to_s3(local_path, bucket_name, s3_root_folder_name):
-    """
-    Upload a single file to AWS S3 and return the URL of the uploaded file.
-    """
-    s3 = boto3.client("s3")
-    filename = os.path.basename(local_path)
+def fetch_address(lat, lon):
+    """Reverse geocode a coordinate into the address dict stored with each anomaly."""
+    response = maps_client.get("geocode", {"latlng": f"{lat},{lon}"})
 
-    if s3_root_folder_name and not s3_root_folder_name.endswith("/"):
-        s3_root_folder_name += "/"
+    address = dict(EMPTY_ADDRESS)
+    if response and response.status_code == 200:
+        data_json = response.json()
+        if data_json.get('status') == "OK" and data_json.get('results'):
+            try:
+                result = data_json['results'][0]
+                address["formatted_address"] = result.get('formatted_address', 'Unknown')
+                street_number = street_name = ""
+                for comp in result.get('address_components', []):
+                    types = comp.get('types', [])
+                    if "street_number" in types:
+                        street_number = comp.get('long_name', '')
+                    if "route" in types:
+                        street_name = comp.get('long_name', '')
+                        address["street"] = f"{street_number} {street_name}".strip()
+                    if "locality" in types:
+                        address["city"] = comp.get('long_name', 'Unknown')
+                    if "administrative_area_level_1" in types:
+                        address["state"] = comp.get('short_name', 'Unknown')
+                    if "postal_code" in types:
+                        address["zipcode"] = comp.get('long_name', 'Unknown')
+            except (IndexError, KeyError) as e:
+                print("Error parsing response:", str(e))
+        else:
+            print(
+                f"[GEOCODE FAIL] coord=({lat},{lon}) HTTP={response.status_code} "
+                f"status={data_json.get('status')} results={len(data_json.get('results', []))} "
+                f"URL={response.url}"
+            )
+    else:
+        code = response.status_code if response else "no-response"
+        body = response.text if response else "—"
+        print(
+            f"[GEOCODE HTTP ERROR] coord=({lat},{lon}) HTTP={code} body={body}"
+        )
+    return address
 
-    s3_path = f"{s3_root_folder_name}{filename}"
 
-    try:
-        s3.upload_file(local_path, bucket_name, s3_path)
-        url = f"https://{bucket_name}.s3.amazonaws.com/{s3_path}"
-        print(f"Uploaded to S3: {url}")
-        return url
-    except Exception as e:
-        print(f"Failed to upload {local_path} to S3: {e}")
+def fetch_panorama_metadata(lat, lon):
+    """Look up which Street View panorama serves a coordinate. Returns the metadata dict or None."""
+    response = maps_client.get("streetview_metadata", {"location": f"{lat},{lon}"})
+    if response is None or response.status_code != 200:
         return None
+    return response.json()
 
 
-def delete_s3_folder(bucket_name, folder_prefix):
-    """Deletes all objects under a folder prefix in the given S3 bucket to avoid overhead."""
-    s3 = boto3.client("s3")
-    try:
-        response = s3.list_objects_v2(Bucket=bucket_name, Prefix=folder_prefix)
-        if 'Contents' in response:
-            objects_to_delete = [{'Key': obj['Key']} for obj in response['Contents']]
-            s3.delete_objects(Bucket=bucket_name, Delete={'Objects': objects_to_delete})
-            print(f"Deleted {len(objects_to_delete)} objects from {folder_prefix}")
-    except Exception as e:
-        print(f"Error deleting S3 folder {folder_prefix}: {e}")
+def fetch_streetview(lat, lon, direction, heading, size="640x640", fov=90, pitch=0, pano_id=None):
+    """Download one Street View frame and return its JPEG bytes, or None on failure."""
+    params = {"size": size, "fov": fov, "heading": heading, "pitch": pitch, "location": f"{lat},{lon}"}
+    if pano_id:
+        # Pin the panorama found by the metadata pre-check
+        params["pano"] = pano_id
+        del params["location"]
+    response = maps_client.get("streetview", params)
 
+    if response and response.status_code == 200:
+        return response.content
 
-@socketio.on('start_stream')
-def stream_all_images(data):
-    print("Socket successfully established with client")
-    user_id = int(data.get('userId'))
-    startLat = float(data.get('startLatInput'))
-    startLng = float(data.get('startLngInput'))
-    endLat = float(data.get('endLatInput'))
-    endLng = float(data.get('endLngInput'))
-    num_points = int(data.get('num_points'))
-    model = str(data.get('model'))
-
-    coords = generate_coordinates(startLat, startLng, endLat, endLng, num_points)
-
-    api_key = os.getenv("GOOGLE_API_KEY")
-    print(f"API Key loaded: {'Yes' if api_key else 'No'}")
-    bucket_name = os.getenv("S3_BUCKET_NAME")
-    s3_stream_root_folder_name = f'user{user_id}-livestream'
-    detected_temp_dir = "detected_temp"
-    stream_temp_dir = "stream_temp"
-    s3_detected_root_folder_name = 'detected-images'
-    delete_s3_folder(bucket_name, s3_stream_root_folder_name)
+    code = response.status_code if response else "no-response"
+    body_snip = (response.text[:200] + "...") if response and response.text else "—"
+    print(
+        f"[STREETVIEW FAIL] direction={direction} coord=({lat},{lon}) "
+        f"HTTP={code} body={body_snip} URL={response.url if response else MAPS_ENDPOINTS['streetview']}"
+    )
+    return None
 
-    size = "640x640"
-    fov = 90
-    pitch = 0
-    headings = {"front": 90, "right": 180, "back": 270, "left": 360}
 
-    os.makedirs(stream_temp_dir, exist_ok=True)
-    os.makedirs(detected_temp_dir, exist_ok=True)
+# Detector modules are imported on first use so the REST API starts without torch/transformers
+DETECTOR_MODULES = {
+    'dino': "detection_models.grounding_dino",
+    'owlvit': "detection_models.owlvit",
+    'yolo': "detection_models.combined_yolos",
+    'cascade': "detection_models.cascade",
+}
 
-    for idx, (lat, lon) in enumerate(coords):
-        for direction, heading in headings.items():
-            # --- Geocode request with detailed logging ---
-            geocode_url = "https://maps.googleapis.com/maps/api/geocode/json"
-            params = {"latlng": f"{lat},{lon}", "key": api_key}
-            try:
-                response = requests.get(geocode_url, params=params, timeout=10)
-            except Exception as e:
-                print(f"[GEOCODE ERROR] Exception for ({lat}, {lon}): {e}")
-                response = None
-
-            address = {'formatted_address': "", 'street': "", 'city': "", 'state': "", 'zipcode': ""}
-            if response and response.status_code == 200:
-                data_json = response.json()
-                if data_json.get('status') == "OK" and data_json.get('results'):
-                    try:
-                        result = data_json['results'][0]
-                        address["formatted_address"] = result.get('formatted_address', 'Unknown')
-                        street_number = street_name = ""
-                        for comp in result.get('address_components', []):
-                            types = comp.get('types', [])
-                            if "street_number" in types:
-                                street_number = comp.get('long_name', '')
-                            if "route" in types:
-                                street_name = comp.get('long_name', '')
-                                address["street"] = f"{street_number} {street_name}".strip()
-                            if "locality" in types:
-                                address["city"] = comp.get('long_name', 'Unknown')
-                            if "administrative_area_level_1" in types:
-                                address["state"] = comp.get('short_name', 'Unknown')
-                            if "postal_code" in types:
-                                address["zipcode"] = comp.get('long_name', 'Unknown')
-                    except (IndexError, KeyError) as e:
-                        print("Error parsing response:", str(e))
-                else:
-                    print(
-                        f"[GEOCODE FAIL] coord=({lat},{lon}) HTTP={response.status_code} "
-                        f"status={data_json.get('status')} results={len(data_json.get('results', []))} "
-                        f"URL={response.url}"
-                    )
-            else:
-                code = response.status_code if response else "no-response"
-                body = response.text if response else "—"
-                print(
-                    f"[GEOCODE HTTP ERROR] coord=({lat},{lon}) HTTP={code} body={body}"
-                )
 
-            # --- Street View request with detailed logging ---
-            streetview_url = "https://maps.googleapis.com/maps/api/streetview"
-            params = {"size": size, "fov": fov, "heading": heading, "pitch": pitch, "key": api_key, "location": f"{lat},{lon}"}
-            try:
-                response = requests.get(streetview_url, params=params, timeout=10)
-            except Exception as e:
-                print(f"[STREETVIEW ERROR] Exception for ({lat}, {lon}, {direction}): {e}")
-                response = None
+def get_detector(model):
+    if model not in DETECTOR_MODULES:
+        raise ValueError(f"Unknown model: {model}")
+    return importlib.import_module(DETECTOR_MODULES[model])
 
-            if response and response.status_code == 200:
-                timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-                image_name = f"{timestamp}_{idx + 1}.jpg"
-                stream_temp_local_path = os.path.join(stream_temp_dir, image_name)
 
-                # Step 1: Save the image from response
-                with open(stream_temp_local_path, "wb") as f:
-                    f.write(response.content)
+def run_detection_batch(model, images, timings=None):
+    """
+    Run the selected model on all frames of a waypoint at once: YOLO decodes
+    once and runs them as one batch, DINO/OWL-ViT caption and score every
+    candidate box of the waypoint in one BLIP batch and one cross-encoder call,
+    and the cascade escalates only the frames YOLO is unsure about to DINO.
+    """
+    def detect():
+        # Resolved on the inference thread: the first call imports torch and the model module
+        detector = get_detector(model)
+        if model == 'yolo':
+            return detector.detect_batch(images, timings=timings)
+        return detector.detect_batch(images, text_labels, timings=timings)
 
-                # Step 2: Mask the bottom-left area to remove Google watermark
-                img = cv2.imread(stream_temp_local_path)
-                if img is not None:
-                    h, w, _ = img.shape
+    return inference_executor.run(detect)
 
-                    # Define the mask size (adjust if needed)
-                    mask_width = 640   # width of the masked area
-                    mask_height = 20   # height of the masked area
 
-                    # Coordinates: bottom-left corner
-                    x1 = 0
-                    y1 = h - mask_height
-                    x2 = x1 + mask_width
-                    y2 = h
+def start_model_warmup(models):
+    """
+    Load and warm up the models behind the given stream model options
+    ("dino", "owlvit", "yolo", "cascade") in the background. Loading runs on the
+    inference threads, so the server keeps answering requests meanwhile.
+    """
+    def warm_up():
+        from detection_models.model_registry import registry, STREAM_MODEL_DEPENDENCIES
+        for model in models:
+            inference_executor.run(get_detector, model)
+            for name in STREAM_MODEL_DEPENDENCIES.get(model, []):
+                try:
+                    inference_executor.run(registry.warm_up, name)
+                except Exception as e:
+                    print(f"[WARMUP] Failed to warm up '{name}': {e}")
 
-                    # Fill with black (0, 0, 0) or use white (255, 255, 255)
-                    cv2.rectangle(img, (x1, y1), (x2, y2), color=(0, 0, 0), thickness=-1)
+    thread = threading.Thread(target=warm_up, name="model-warmup", daemon=True)
+    thread.start()
+    return thread
 
-                    # Save masked image back
-                    cv2.imwrite(stream_temp_local_path, img)
-                else:
-                    print(f"❌ Failed to load image for masking: {stream_temp_local_path}")
 
+HEADINGS = {"front": 90, "right": 180, "back": 270, "left": 360}
 
-                # Run selected detection model
-                try:
-                    if model == 'dino':
-                        detected, output = grounding_dino.detect_objects(stream_temp_local_path, text_labels)
-                    elif model == 'owlvit':
-                        detected, output = owlvit.detect_objects(stream_temp_local_path, text_labels)
-                    elif model == 'yolo':
-                        detected, output = combined_yolos.detect_objects(stream_temp_local_path)
-                    else:
-                        raise ValueError(f"Unknown model: {model}")
+# Sessions currently streaming in this process: session_id -> {"sid", "control", "done", "run_id"}
+active_sessions = {}
+
+
+@socketio.on('start_stream')
+def stream_all_images(data):
+    print("Socket successfully established with client")
+    params = {
+        "user_id": int(data.get('userId')),
+        "startLat": float(data.get('startLatInput')),
+        "startLng": float(data.get('startLngInput')),
+        "endLat": float(data.get('endLatInput')),
+        "endLng": float(data.get('endLngInput')),
+        "num_points": int(data.get('num_points')),
+        "model": str(data.get('model')),
+        # Replay a previously scanned route from the local caches without calling Google
+        "cache_only": bool(data.get('cache_only', Config.STREETVIEW_CACHE_ONLY)),
+        # Pacing declared by the client: frame rate cap, and whether it acknowledges frames
+        "max_fps": float(data['max_fps']) if data.get('max_fps') else None,
+        "ack_frames": bool(data.get('ack_frames', False)),
+        # "binary" sends preview thumbnails over the socket instead of uploading every frame
+        "preview": str(data.get('preview') or Config.STREAM_PREVIEW_MODE),
+    }
+    session_id = session_store.create(params["user_id"], params)
 
+    if params["preview"] != "binary":
+        # Clear frames of earlier sessions in the background; this session writes below its own prefix
+        s3_stream_root_folder_name = f"user{params['user_id']}-livestream"
+        s3_uploader.delete_prefix(
+            f"{s3_stream_root_folder_name}/", keep_prefix=f"{s3_stream_root_folder_name}/{session_id}/"
+        )
+
+    run_stream_session(session_store.get(session_id))
+
+
+@socketio.on('resume_stream')
+def resume_stream(data):
+    session_id = str(data.get('sessionId'))
+    session = session_store.get(session_id)
+    if session is None or session["status"] in ("completed", "stopped"):
+        emit("stream_session", {"sessionId": session_id, "status": session["status"] if session else "not_found"})
+        return
+    previous_run = active_sessions.get(session_id)
+    if previous_run and previous_run["control"].paused and not previous_run["control"].stopped:
+        # Paused with pause_stream: the pipeline is still alive, just let it continue
+        previous_run["control"].resume()
+        session_store.set_status(session_id, "running")
+        emit("stream_session", {"sessionId": session_id, "status": "running", "runId": previous_run["run_id"]})
+        return
+    if previous_run:
+        # The previous run has not drained yet; stop it before picking up the checkpoint
+        previous_run["control"].stop()
+        previous_run["done"].wait(timeout=30)
+        session = session_store.get(session_id)
+    print(f"Resuming stream session {session_id} after waypoint {session['last_waypoint']} ({session['last_direction']})")
+    run_stream_session(session)
+
+
+@socketio.on('stop_stream')
+def stop_stream(data):
+    session_id = str(data.get('sessionId'))
+    run = active_sessions.get(session_id)
+    if run:
+        print(f"Stopping stream session {session_id}")
+        run["control"].stop()
+    session_store.set_status(session_id, "stopped")
+    emit("stream_session", {"sessionId": session_id, "status": "stopped"})
+
+
+@socketio.on('pause_stream')
+def pause_stream(data):
+    session_id = str(data.get('sessionId'))
+    run = active_sessions.get(session_id)
+    if run:
+        print(f"Pausing stream session {session_id}")
+        run["control"].pause()
+        session_store.set_status(session_id, "paused")
+    emit("stream_session", {"sessionId": session_id, "status": "paused" if run else "not_found"})
+
+
+@socketio.on('frame_ack')
+def frame_ack(data):
+    run = active_sessions.get(str(data.get('sessionId')))
+    # Frame counts restart with every run; ignore late acks of a previous run
+    if run and data.get('runId', run["run_id"]) == run["run_id"]:
+        run["control"].ack(data.get('received', 0))
+
+
+@socketio.on('disconnect')
+def pause_on_disconnect():
+    # Nobody is watching any more: stop spending API calls and inference, keep the checkpoint
+    for session_id, run in list(active_sessions.items()):
+        if run["sid"] == request.sid:
+            print(f"Client disconnected; pausing stream session {session_id}")
+            session_store.set_status(session_id, "paused")
+            run["control"].stop()
+
+
+def remaining_waypoints(waypoints, last_waypoint, last_direction):
+    """Yield the waypoints (and their directions) not yet delivered according to the checkpoint."""
+    directions = list(HEADINGS)
+    for waypoint in waypoints:
+        idx = waypoint["idx"]
+        if idx < last_waypoint:
+            continue
+        if idx == last_waypoint:
+            pending = directions[directions.index(last_direction) + 1:] if last_direction in directions else []
+            if not pending:
+                continue
+        else:
+            pending = directions
+        yield {**waypoint, "directions": pending, "frames": []}
+
+
+def run_stream_session(session):
+    """Stream a session from its checkpoint to the end of the route, or until it is paused."""
+    session_id = session["id"]
+    params = session["params"]
+    user_id = params["user_id"]
+    model = params["model"]
+    cache_only = params["cache_only"]
+    binary_preview = params.get("preview") == "binary"
+
+    # Stages run on worker threads, outside the Socket.IO request and app contexts
+    sid = request.sid
+    app = current_app._get_current_object()
+    control = StreamControl(
+        max_fps=params.get("max_fps"),
+        max_inflight=Config.STREAM_MAX_INFLIGHT_FRAMES if params.get("ack_frames") else None,
+    )
+    gate = FrameGate(
+        Config.FRAME_GATE_MAX_UNIFORM, Config.FRAME_GATE_MIN_SHARPNESS, Config.FRAME_GATE_MIN_BRIGHTNESS,
+        Config.FRAME_GATE_MAX_BRIGHTNESS, Config.FRAME_GATE_DUPLICATE_DIFF,
+    ) if Config.FRAME_GATE_ENABLED else None
+    # Registered before the panorama pre-check, so stop_stream / pause_stream reach this run from the start
+    done = threading.Event()
+    run_id = uuid.uuid4().hex
+    active_sessions[session_id] = {"sid": sid, "control": control, "done": done, "run_id": run_id}
+    session_store.set_status(session_id, "running")
+    emit("stream_session", {
+        "sessionId": session_id,
+        "status": "running",
+        "runId": run_id,
+        "resumeFrom": {"waypoint": session["last_waypoint"], "direction": session["last_direction"]},
+    })
+
+    coords = generate_coordinates(
+        params["startLat"], params["startLng"], params["endLat"], params["endLng"], params["num_points"]
+    )
+    if Config.STREETVIEW_METADATA_CHECK and not cache_only:
+        # Drop points without imagery and points that snap to an already covered panorama;
+        # once the run is stopped the remaining lookups are skipped
+        try:
+            waypoints, pano_stats = resolve_panoramas(
+                coords,
+                lambda lat, lon: None if control.stopped else fetch_panorama_metadata(lat, lon),
+                max_workers=Config.MAPS_MAX_CONCURRENCY,
+            )
+        except Exception:
+            active_sessions.pop(session_id, None)
+            done.set()
+            raise
+        print(f"Panorama pre-check: {pano_stats}")
+        if control.stopped:
+            active_sessions.pop(session_id, None)
+            done.set()
+            print(f"Stream session {session_id} stopped during the panorama pre-check")
+            return
+    else:
+        waypoints = [
+            {"idx": idx, "lat": lat, "lon": lon, "pano_id": None}
+            for idx, (lat, lon) in enumerate(coords)
+        ]
+
+    print(f"API Key loaded: {'Yes' if maps_client.api_key else 'No'}")
+    s3_detected_root_folder_name = 'detected-images'
+    s3_session_folder_name = f"user{user_id}-livestream/{session_id}"
+
+    size = "640x640"
+    fov = 90
+    pitch = 0
+
+    # Seconds per detection stage (detector, BLIP captions, cross-encoder) over the session,
+    # plus frames screened / escalated by the cascade
+    detect_timings = {}
+    started = time.perf_counter()
+
+    def session_stats():
+        elapsed = time.perf_counter() - started
+        stats = {"frames": control.emitted, "fps": round(control.emitted / elapsed, 2) if elapsed else 0.0}
+        if detect_timings.get("frames"):
+            stats["escalationRate"] = round(detect_timings["escalated"] / detect_timings["frames"], 3)
+        if gate:
+            stats["gateRate"] = round(gate.stats()["gate_rate"], 3)
+        return stats
+
+    # ===== Pipeline stages (one item per waypoint) =====
+    def fetch_stage(waypoint):
+        lat, lon = waypoint["lat"], waypoint["lon"]
+        # One reverse geocode per waypoint, shared by all headings
+        if cache_only:
+            waypoint["address"] = geocode_cache.get(lat, lon) or dict(EMPTY_ADDRESS)
+        else:
+            waypoint["address"] = geocode_cache.get_or_fetch(
+                lat, lon, lambda: fetch_address(lat, lon)
+            )
+        for direction in waypoint["directions"]:
+            if not control.proceed():
+                return None
+            heading = HEADINGS[direction]
+            content = streetview_cache.get_or_fetch(
+                lat, lon, heading, fov, pitch, size,
+                lambda: fetch_streetview(lat, lon, direction, heading, size, fov, pitch, waypoint["pano_id"]),
+                cache_only=cache_only,
+            )
+            if content is None:
+                continue
+            waypoint["frames"].append({
+                "direction": direction,
+                "content": content,
+            })
+        return waypoint
+
+    def preprocess_stage(waypoint):
+        frames = []
+        for frame in waypoint["frames"]:
+            timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
+            frame["image_name"] = f"{timestamp}_{waypoint['idx'] + 1}_{frame['direction']}.jpg"
+
+            # Decode once into memory and mask the watermark in place
+            try:
+                frame["image"] = mask_watermark(decode_image(frame["content"]))
+            except ValueError as e:
+                print(f"❌ Failed to decode {frame['image_name']}: {e}")
+                continue
+            # Placeholder, blurred, badly exposed and repeated frames skip inference and upload
+            frame["gated"] = gate.check(frame["image"], frame["direction"]) if gate else None
+            frames.append(frame)
+        waypoint["frames"] = frames
+        return waypoint
+
+    def detect_stage(waypoint):
+        for frame in waypoint["frames"]:
+            frame["detected"], frame["output"] = False, []
+        frames = [frame for frame in waypoint["frames"] if not frame["gated"]]
+        if not frames:
+            return waypoint
+        # All headings of the waypoint go through the detector as one batch
+        if not control.proceed():
+            return None
+        try:
+            results = run_detection_batch(model, [frame["image"] for frame in frames], detect_timings)
+        except Exception as e:
+            print(f"Detection failed on waypoint {waypoint['idx'] + 1}: {e}")
+            results = [(False, [])] * len(frames)
+        for frame, (detected, output) in zip(frames, results):
+            frame["detected"], frame["output"] = detected, output
+        return waypoint
+
+    def persist_stage(waypoint):
+        lat, lon = waypoint["lat"], waypoint["lon"]
+        # Frames an earlier run of this session already uploaded and registered (it ran ahead
+        # of the emitted checkpoint): reuse their URL instead of persisting them again
+        persisted = session_store.persisted(session_id, waypoint["idx"])
+        # Queue every upload of the waypoint first so they run in parallel.
+        # Detected frames are uploaded once to the detected folder and that
+        # URL doubles as the live preview URL. In binary preview mode the
+        # other frames never touch S3; their thumbnail goes out with the payload.
+        for frame in waypoint["frames"]:
+            if frame["gated"]:
+                continue
+            if binary_preview:
+                frame["preview"] = encode_preview(
+                    frame["image"], Config.STREAM_PREVIEW_MAX_SIZE,
+                    Config.STREAM_PREVIEW_FORMAT, Config.STREAM_PREVIEW_QUALITY
+                )
+            if frame["direction"] in persisted:
+                continue
+            if frame["detected"]:
+                key = f"{s3_detected_root_folder_name}/{frame['image_name']}"
+            elif binary_preview:
+                continue
+            else:
+                key = f"{s3_session_folder_name}/{frame['direction']}/{frame['image_name']}"
+            frame["upload"] = s3_uploader.upload_bytes(encode_jpeg(frame["image"]), key)
+
+        with app.app_context():
+            for frame in waypoint["frames"]:
+                if frame["gated"]:
+                    frame["url"] = None
+                    continue
+                if frame["direction"] in persisted:
+                    frame["url"] = persisted[frame["direction"]]
+                    continue
+                upload = frame.pop("upload", None)
+                frame["url"] = upload.result() if upload else None
+                try:
                     handle_detection_result(
-                        detected, output, image_name, response.content,
-                        detected_temp_dir, bucket_name, s3_detected_root_folder_name,
-                        lat, lon, address, direction
+                        frame["detected"], frame["output"], frame["url"],
+                        lat, lon, waypoint["address"], frame["direction"]
                     )
                 except Exception as e:
-                    print(f"Detection failed on {image_name}: {e}")
-                    detected, output = False, []
-
-                # Upload stream image and emit
-                s3_stream_image_path = f"{s3_stream_root_folder_name}/{direction}/{image_name}"
-                s3_stream_image_url = upload_file_to_s3(stream_temp_local_path, bucket_name, s3_stream_image_path)
-                emit("start_stream", {
-                    "direction": direction,
-                    "url": s3_stream_image_url,
-                    "lat": lat,
-                    "lon": lon,
-                    "detected": detected,
-                    "boxes": [d["box"] for d in output] if detected else [],
-                    "labels": [d["label"] for d in output] if detected else [],
-                    "scores": [d["score"] for d in output] if detected else []
-                })
-            else:
-                code = response.status_code if response else "no-response"
-                body_snip = (response.text[:200] + "...") if response and response.text else "—"
-                print(
-                    f"[STREETVIEW FAIL] direction={direction} coord=({lat},{lon}) "
-                    f"HTTP={code} body={body_snip} URL={response.url if response else streetview_url}"
-                )
-
+                    print(f"Failed to persist detection for {frame['image_name']}: {e}")
+                    continue
+                session_store.mark_persisted(session_id, waypoint["idx"], frame["direction"], frame["url"])
+        return waypoint
+
+    def emit_stage(waypoint):
+        for frame in waypoint["frames"]:
+            if frame["gated"]:
+                # No image to show: just tell the client the frame was skipped and why
+                socketio.emit("frame_gated", {
+                    "sessionId": session_id,
+                    "waypoint": waypoint["idx"],
+                    "direction": frame["direction"],
+                    "lat": waypoint["lat"],
+                    "lon": waypoint["lon"],
+                    "reason": frame["gated"],
+                }, to=sid)
+                session_store.checkpoint(session_id, waypoint["idx"], frame["direction"])
+                continue
+            if not control.wait_for_emit_slot():
+                return None
+            detected, output = frame["detected"], frame["output"]
+            payload = {
+                "direction": frame["direction"],
+                "url": frame["url"],
+                "lat": waypoint["lat"],
+                "lon": waypoint["lon"],
+                "detected": detected,
+                "boxes": [d["box"] for d in output] if detected else [],
+                "labels": [d["label"] for d in output] if detected else [],
+                "scores": [d["score"] for d in output] if detected else []
+            }
+            if binary_preview:
+                # Sent as a binary Socket.IO attachment, not base64 inside the JSON
+                payload["image"] = frame["preview"]
+                payload["imageType"] = PREVIEW_CONTENT_TYPES.get(Config.STREAM_PREVIEW_FORMAT, "image/jpeg")
+            socketio.emit("start_stream", payload, to=sid)
+            control.frame_emitted()
+            session_store.checkpoint(session_id, waypoint["idx"], frame["direction"])
+        # Headings whose fetch failed count as done too, so a resume moves past them
+        session_store.checkpoint(session_id, waypoint["idx"], waypoint["directions"][-1])
+        socketio.emit("stream_status", {
+            "sessionId": session_id,
+            "waypoint": waypoint["idx"],
+            "queueDepth": pipeline.queue_depths(),
+            "inflight": control.inflight,
+            "paused": control.paused,
+            **session_stats(),
+        }, to=sid)
+        return waypoint
+
+    pipeline = StreamPipeline([
+        Stage("fetch", fetch_stage, Config.STREAM_FETCH_WORKERS, Config.STREAM_QUEUE_SIZE),
+        Stage("preprocess", preprocess_stage, Config.STREAM_PREPROCESS_WORKERS, Config.STREAM_QUEUE_SIZE),
+        Stage("detect", detect_stage, Config.STREAM_DETECT_WORKERS, Config.STREAM_QUEUE_SIZE),
+        Stage("persist", persist_stage, Config.STREAM_PERSIST_WORKERS, Config.STREAM_QUEUE_SIZE),
+        Stage("emit", emit_stage, 1, Config.STREAM_QUEUE_SIZE, ordered=True),
+    ], stop_event=control.stop_event)
+    try:
+        pipeline.run(remaining_waypoints(waypoints, session["last_waypoint"], session["last_direction"]))
+    finally:
+        active_sessions.pop(session_id, None)
+        done.set()
+
+    stats = session_stats()
+    if control.stopped:
+        print(f"Stream session {session_id} ended early ({session_store.get(session_id)['status']})")
+    else:
+        session_store.set_status(session_id, "completed")
+        socketio.emit("stream_session", {"sessionId": session_id, "status": "completed", "stats": stats}, to=sid)
+    print(f"Session {session_id} ({model}): {stats}")
+    print(f"Geocode cache: {geocode_cache.stats()}")
+    print(f"Street View cache: {streetview_cache.stats()}")
+    print(f"Maps API: {maps_client.stats()}")
+    print(f"Inference: {inference_executor.stats()}")
+    if gate:
+        print(f"Frame gate: {gate.stats()}")
+    if detect_timings:
+        print(f"Detection stages: { {key: round(value, 2) for key, value in detect_timings.items()} }")
 
-    # Test API key
-    test_params = {
-        "latlng": "37.7749,-122.4194",  # San Francisco coordinates
-        "key": api_key
-    }
-    test_response = requests.get("https://maps.googleapis.com/maps/api/geocode/json", params=test_params)
-    print(f"Test API response status: {test_response.status_code}")
-    print(f"Test API response: {test_response.json()}")
 
 def handle_detection_result(
-    detected, output, image_name, response_content, detected_temp_dir,
-    bucket_name, s3_detected_root_folder_name, lat, lon, address, direction
+    detected, output, s3_detected_image_url, lat, lon, address, direction
 ):
-    if detected:
-        detected_temp_local_path = os.path.join(detected_temp_dir, image_name)
-        with open(detected_temp_local_path, "wb") as f:
-            f.write(response_content)
+    if detected and s3_detected_image_url:
+        # 🧠 Extract the first caption from detection output, if available
+        caption = output[0].get("caption") if output else None
 
-        s3_detected_image_url = upload_file_to_s3(
-            detected_temp_local_path, bucket_name, s3_detected_root_folder_name
+        # ✅ Add caption as new argument in DB insert function
+        mysql_db_utils.register_anomaly_to_db(
+            lat, lon, address, direction, s3_detected_image_url, output, caption
         )
-
-        if s3_detected_image_url:
-            # 🧠 Extract the first caption from detection output, if available
-            caption = output[0].get("caption") if output else None
-
-            # ✅ Add caption as new argument in DB insert function
-            mysql_db_utils.register_anomaly_to_db(
-                lat, lon, address, direction, s3_detected_image_url, output, caption
-            )
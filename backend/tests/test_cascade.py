@@ -0,0 +1,20 @@
+import pytest
+
+pytest.importorskip("torch")
+
+from detection_models.cascade import deduplicate
+
+
+def test_merges_yolo_label_and_dino_phrase_for_the_same_box():
+    yolo = {"box": [10, 10, 110, 90], "label": "a tent on the sidewalk", "score": 0.8, "caption": None, "ce_score": None}
+    dino = {"box": [12, 11, 108, 92], "label": "tent", "score": 0.45, "caption": "a tent", "ce_score": 0.3}
+    assert deduplicate([yolo, dino]) == [yolo]
+
+
+def test_keeps_other_types_and_separate_boxes():
+    detections = [
+        {"box": [10, 10, 110, 90], "label": "a graffiti vandalism", "score": 0.8},
+        {"box": [10, 10, 110, 90], "label": "tent", "score": 0.5},
+        {"box": [300, 300, 400, 380], "label": "graffiti", "score": 0.6},
+    ]
+    assert deduplicate(detections) == detections
@@ -0,0 +1,30 @@
+import random
+
+from utils.compact_events import plan_merges
+from utils.mysql_db_utils import haversine_m
+
+
+def test_merges_events_straddling_longitude_cells():
+    # 9.92 m apart; per-event longitude cell widths used to put them in non-neighbouring cells
+    events = [(1, 37.203878, -122.004917, {"tent"}), (2, 37.203947, -122.004846, {"tent"})]
+    assert plan_merges(events, 15) == {2: 1}
+
+
+def test_keeps_other_types_and_far_events():
+    events = [
+        (1, 37.2, -122.0, {"tent"}),
+        (2, 37.2, -122.0, {"graffiti"}),
+        (3, 37.21, -122.0, {"tent"}),
+    ]
+    assert plan_merges(events, 15) == {}
+
+
+def test_merges_every_close_pair():
+    rng = random.Random(0)
+    for index in range(2000):
+        lat, lon = rng.uniform(-60, 60), rng.uniform(-180, 180)
+        other = (lat + rng.uniform(-8e-5, 8e-5), lon + rng.uniform(-8e-5, 8e-5))
+        if haversine_m(lat, lon, *other) > 10:
+            continue
+        events = [(1, lat, lon, {"tent"}), (2, *other, {"tent"})]
+        assert plan_merges(events, 10) == {2: 1}, events
@@ -0,0 +1,50 @@
+from utils.maps_client import MapsClient
+
+
+class FakeResponse:
+    def __init__(self, status_code, body=None):
+        self.status_code = status_code
+        self.body = body
+
+    def json(self):
+        if self.body is None:
+            raise ValueError("not JSON")
+        return self.body
+
+
+def client_with(responses):
+    client = MapsClient("key", max_retries=3, backoff=0)
+    calls = []
+
+    def get(url, params, timeout):
+        calls.append(params)
+        return responses.pop(0)
+
+    client.session.get = get
+    return client, calls
+
+
+def test_retries_over_query_limit_body():
+    client, calls = client_with([
+        FakeResponse(200, {"status": "OVER_QUERY_LIMIT"}),
+        FakeResponse(200, {"status": "OK", "results": []}),
+    ])
+    response = client.get("geocode", {"latlng": "1,2"})
+    assert response.json()["status"] == "OK"
+    assert len(calls) == 2
+    assert client.stats()["geocode"]["retries"] == 1
+    assert client.stats()["geocode"]["failures"] == 0
+
+
+def test_gives_up_and_counts_failure_after_max_retries():
+    client, calls = client_with([FakeResponse(200, {"status": "OVER_QUERY_LIMIT"}) for _ in range(4)])
+    client.get("streetview_metadata", {"location": "1,2"})
+    assert len(calls) == 4
+    assert client.stats()["streetview_metadata"]["failures"] == 1
+
+
+def test_does_not_retry_final_statuses_or_image_bodies():
+    client, calls = client_with([FakeResponse(200, {"status": "ZERO_RESULTS"}), FakeResponse(200)])
+    client.get("geocode", {"latlng": "1,2"})
+    client.get("streetview", {"location": "1,2"})
+    assert len(calls) == 2
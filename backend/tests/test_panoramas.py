@@ -0,0 +1,20 @@
+from utils.panoramas import resolve_panoramas
+
+COORDS = [(37.0, -122.0), (37.1, -122.1), (37.2, -122.2), (37.3, -122.3), (37.4, -122.4)]
+METADATA = {
+    (37.0, -122.0): {"status": "OK", "pano_id": "pano-a"},
+    (37.1, -122.1): {"status": "ZERO_RESULTS"},
+    (37.2, -122.2): {"status": "OK", "pano_id": "pano-a"},
+    (37.3, -122.3): None,
+    (37.4, -122.4): {"status": "OK", "pano_id": "pano-b"},
+}
+
+
+def test_resolve_panoramas_with_stub_lookup():
+    waypoints, stats = resolve_panoramas(COORDS, lambda lat, lon: METADATA[(lat, lon)], max_workers=2)
+    assert waypoints == [
+        {"idx": 0, "lat": 37.0, "lon": -122.0, "pano_id": "pano-a"},
+        {"idx": 3, "lat": 37.3, "lon": -122.3, "pano_id": None},
+        {"idx": 4, "lat": 37.4, "lon": -122.4, "pano_id": "pano-b"},
+    ]
+    assert stats == {"points": 5, "no_imagery": 1, "duplicates": 1, "unresolved": 1, "panoramas": 3}
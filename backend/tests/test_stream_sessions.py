@@ -0,0 +1,25 @@
+from utils.stream_sessions import StreamSessionStore
+
+
+def test_checkpoint_and_status(tmp_path):
+    store = StreamSessionStore(str(tmp_path / "sessions.db"))
+    session_id = store.create(7, {"model": "yolo"})
+    store.checkpoint(session_id, 3, "back")
+    store.set_status(session_id, "paused")
+    session = store.get(session_id)
+    assert (session["status"], session["last_waypoint"], session["last_direction"]) == ("paused", 3, "back")
+    assert session["params"] == {"model": "yolo"}
+
+
+def test_persisted_frames_survive_a_new_store(tmp_path):
+    path = str(tmp_path / "sessions.db")
+    store = StreamSessionStore(path)
+    session_id = store.create(7, {})
+    store.mark_persisted(session_id, 5, "front", "https://bucket/detected-images/a.jpg")
+    store.mark_persisted(session_id, 5, "left", None)
+    store.mark_persisted(session_id, 6, "front", None)
+
+    reopened = StreamSessionStore(path)
+    assert reopened.persisted(session_id, 5) == {"front": "https://bucket/detected-images/a.jpg", "left": None}
+    assert reopened.persisted(session_id, 4) == {}
+    assert reopened.persisted("other", 5) == {}
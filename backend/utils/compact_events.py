@@ -0,0 +1,115 @@
+"""
+One-off compaction of duplicate detection events.
+
+Events created before geo-radius clustering (or by concurrent streams) can
+describe the same anomaly several times. This job walks the events oldest
+first and merges every event into an earlier one within the cluster radius
+that shares a detection type: its images (and with them their metadata and
+tasks) are moved to the surviving event and the duplicate event is deleted.
+
+Run from backend/:
+    python -m utils.compact_events --dry-run
+    python -m utils.compact_events --radius 15
+"""
+import argparse
+from collections import defaultdict
+
+from dotenv import load_dotenv
+from flask import Flask
+
+load_dotenv()
+
+from config import Config
+from extensions import db
+from mysql_models import DetectionEvent, DetectionImage, DetectionMetadata
+from utils.mysql_db_utils import haversine_m, radius_to_degrees
+
+
+def load_events():
+    """Return [(id, lat, lon, {types})] ordered by id."""
+    rows = (
+        db.session.query(DetectionEvent.id, DetectionEvent.latitude, DetectionEvent.longitude, DetectionMetadata.type)
+        .outerjoin(DetectionImage, DetectionImage.event_id == DetectionEvent.id)
+        .outerjoin(DetectionMetadata, DetectionMetadata.image_id == DetectionImage.id)
+        .order_by(DetectionEvent.id)
+        .all()
+    )
+    events = {}
+    for event_id, lat, lon, detection_type in rows:
+        event = events.setdefault(event_id, (event_id, float(lat), float(lon), set()))
+        if detection_type is not None:
+            event[3].add(detection_type)
+    return list(events.values())
+
+
+def plan_merges(events, radius_m):
+    """
+    Map each duplicate event ID to the ID of the surviving event it merges into.
+
+    Survivors are kept in a grid of radius-sized cells, so each event is only
+    compared with survivors in its own and neighbouring cells. All cells share
+    one longitude width, sized for the highest latitude of the run, so events
+    within the radius always land in neighbouring cells.
+    """
+    events = list(events)
+    if not events:
+        return {}
+    cell_lat, cell_lon = radius_to_degrees(max(abs(event[1]) for event in events), radius_m)
+    grid = defaultdict(list)
+    merges = {}
+    for event_id, lat, lon, types in events:
+        cell = (int(lat // cell_lat), int(lon // cell_lon))
+        best, best_distance = None, radius_m
+        for d_lat in (-1, 0, 1):
+            for d_lon in (-1, 0, 1):
+                for survivor in grid[(cell[0] + d_lat, cell[1] + d_lon)]:
+                    if not types & survivor[3]:
+                        continue
+                    distance = haversine_m(lat, lon, survivor[1], survivor[2])
+                    if distance <= best_distance:
+                        best, best_distance = survivor, distance
+        if best is not None:
+            merges[event_id] = best[0]
+            best[3].update(types)
+        else:
+            grid[cell].append((event_id, lat, lon, set(types)))
+    return merges
+
+
+def apply_merges(merges, batch_size=500):
+    targets = defaultdict(list)
+    for duplicate_id, survivor_id in merges.items():
+        targets[survivor_id].append(duplicate_id)
+    for survivor_id, duplicate_ids in targets.items():
+        for start in range(0, len(duplicate_ids), batch_size):
+            batch = duplicate_ids[start:start + batch_size]
+            DetectionImage.query.filter(DetectionImage.event_id.in_(batch)).update(
+                {DetectionImage.event_id: survivor_id}, synchronize_session=False
+            )
+            DetectionEvent.query.filter(DetectionEvent.id.in_(batch)).delete(synchronize_session=False)
+        db.session.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Merge duplicate detection events within a radius.")
+    parser.add_argument("--radius", type=float, default=Config.EVENT_CLUSTER_RADIUS_M, help="meters")
+    parser.add_argument("--dry-run", action="store_true", help="only report what would be merged")
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    app.config.from_object(Config)
+    db.init_app(app)
+
+    with app.app_context():
+        events = load_events()
+        merges = plan_merges(events, args.radius)
+        print(f"Events: {len(events)}, duplicates within {args.radius} m: {len(merges)}")
+        for duplicate_id, survivor_id in sorted(merges.items())[:20]:
+            print(f"  event {duplicate_id} -> {survivor_id}")
+        if merges and not args.dry_run:
+            apply_merges(merges)
+            print(f"✅ Merged {len(merges)} events into {len(set(merges.values()))}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+import threading
+
+import cv2
+import numpy as np
+
+from utils.image_utils import WATERMARK_MASK_HEIGHT
+
+# Side of the grayscale thumbnail compared for near-duplicates
+THUMBNAIL_SIZE = 32
+
+
+def frame_scores(image: np.ndarray) -> dict:
+    """
+    Cheap quality measures of an RGB frame, computed on its grayscale
+    without the masked watermark strip:
+    - uniform: fraction of pixels within 8 levels of the median (the grey
+      "Sorry, we have no imagery here" placeholder is almost all one value),
+    - sharpness: variance of the Laplacian (low for blurred frames),
+    - brightness: mean gray level (exposure).
+    """
+    gray = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
+    if gray.shape[0] > WATERMARK_MASK_HEIGHT * 2:
+        gray = gray[:-WATERMARK_MASK_HEIGHT]
+    median = np.median(gray)
+    return {
+        "uniform": float(np.mean(np.abs(gray.astype(np.int16) - median) <= 8)),
+        "sharpness": float(cv2.Laplacian(gray, cv2.CV_32F).var()),
+        "brightness": float(gray.mean()),
+    }
+
+
+def thumbnail(image: np.ndarray, size: int = THUMBNAIL_SIZE) -> np.ndarray:
+    gray = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
+    return cv2.resize(gray, (size, size), interpolation=cv2.INTER_AREA).astype(np.float32)
+
+
+class FrameGate:
+    """
+    Per-session gate run on decoded frames before any detector.
+
+    check() returns why a frame should be skipped ("placeholder", "blurry",
+    "underexposed", "overexposed", "duplicate") or None when it is worth
+    running inference on. Near-duplicates are judged against the last frame
+    that passed at the same heading. Any threshold set to 0 disables its check.
+    """
+
+    def __init__(self, max_uniform=0.95, min_sharpness=30.0, min_brightness=20.0,
+                 max_brightness=240.0, duplicate_diff=2.0):
+        self.max_uniform = max_uniform
+        self.min_sharpness = min_sharpness
+        self.min_brightness = min_brightness
+        self.max_brightness = max_brightness
+        self.duplicate_diff = duplicate_diff
+        self.checked = 0
+        self.gated = {}
+        self._previous = {}
+        self._lock = threading.Lock()
+
+    def _reason(self, image, heading):
+        scores = frame_scores(image)
+        if self.max_uniform and scores["uniform"] >= self.max_uniform:
+            return "placeholder"
+        if self.min_brightness and scores["brightness"] < self.min_brightness:
+            return "underexposed"
+        if self.max_brightness and scores["brightness"] > self.max_brightness:
+            return "overexposed"
+        if self.min_sharpness and scores["sharpness"] < self.min_sharpness:
+            return "blurry"
+        if self.duplicate_diff:
+            thumb = thumbnail(image)
+            with self._lock:
+                previous = self._previous.get(heading)
+                if previous is not None and np.mean(np.abs(thumb - previous)) < self.duplicate_diff:
+                    return "duplicate"
+                self._previous[heading] = thumb
+        return None
+
+    def check(self, image: np.ndarray, heading) -> str:
+        reason = self._reason(image, heading)
+        with self._lock:
+            self.checked += 1
+            if reason:
+                self.gated[reason] = self.gated.get(reason, 0) + 1
+        return reason
+
+    def stats(self) -> dict:
+        with self._lock:
+            gated = sum(self.gated.values())
+            return {
+                "checked": self.checked,
+                "gated": gated,
+                "gate_rate": gated / self.checked if self.checked else 0.0,
+                "reasons": dict(self.gated),
+            }
@@ -0,0 +1,96 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+
+class GeocodeCache:
+    """
+    Persistent reverse-geocode cache backed by a local SQLite file.
+
+    Entries are keyed on the coordinate rounded to `precision` decimals, expire
+    after `ttl_seconds`, and the least recently used rows are evicted once the
+    table grows past `max_entries`. Values are the parsed address dicts that
+    register_anomaly_to_db consumes.
+    """
+
+    def __init__(self, path, ttl_seconds=30 * 24 * 3600, max_entries=50000, precision=5):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.precision = precision
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS geocode ("
+                " key TEXT PRIMARY KEY,"
+                " address TEXT NOT NULL,"
+                " fetched_at REAL NOT NULL,"
+                " accessed_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_geocode_accessed ON geocode (accessed_at)")
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=10)
+
+    def key(self, lat, lon):
+        return f"{round(float(lat), self.precision)},{round(float(lon), self.precision)}"
+
+    def get(self, lat, lon):
+        """Return the cached address dict for a coordinate, or None if missing or expired."""
+        key = self.key(lat, lon)
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            row = conn.execute(
+                "SELECT address, fetched_at FROM geocode WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or now - row[1] > self.ttl_seconds:
+                self.misses += 1
+                return None
+            conn.execute("UPDATE geocode SET accessed_at = ? WHERE key = ?", (now, key))
+        self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, lat, lon, address):
+        """Store an address dict and evict expired and least recently used rows."""
+        key = self.key(lat, lon)
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO geocode (key, address, fetched_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(address), now, now),
+            )
+            conn.execute("DELETE FROM geocode WHERE fetched_at < ?", (now - self.ttl_seconds,))
+            conn.execute(
+                "DELETE FROM geocode WHERE key IN ("
+                " SELECT key FROM geocode ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+    def get_or_fetch(self, lat, lon, fetch):
+        """
+        Return the cached address for a coordinate, calling `fetch()` on a miss.
+        Only non-empty results are stored, so failed lookups are retried next time.
+        """
+        address = self.get(lat, lon)
+        if address is not None:
+            return address
+        address = fetch()
+        if address.get("formatted_address"):
+            self.put(lat, lon, address)
+        return address
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
@@ -0,0 +1,75 @@
+import os
+import cv2
+import numpy as np
+from PIL import Image
+
+# Height of the strip masked at the bottom of Street View frames to hide the Google watermark
+WATERMARK_MASK_HEIGHT = 20
+
+
+def decode_image(content: bytes) -> np.ndarray:
+    """Decode encoded image bytes (e.g. a Street View JPEG) into an RGB array."""
+    buffer = np.frombuffer(content, dtype=np.uint8)
+    img = cv2.imdecode(buffer, cv2.IMREAD_COLOR)
+    if img is None:
+        raise ValueError("Failed to decode image bytes")
+    return cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+
+
+def encode_jpeg(image: np.ndarray, quality: int = 90) -> bytes:
+    """Encode an RGB array as JPEG bytes."""
+    ok, buffer = cv2.imencode(
+        ".jpg", cv2.cvtColor(image, cv2.COLOR_RGB2BGR), [cv2.IMWRITE_JPEG_QUALITY, quality]
+    )
+    if not ok:
+        raise ValueError("Failed to encode image as JPEG")
+    return buffer.tobytes()
+
+
+def encode_preview(image: np.ndarray, max_side: int = 320, fmt: str = "jpeg", quality: int = 75) -> bytes:
+    """Encode a downscaled JPEG/WebP thumbnail of an RGB array for the live preview (max_side=0 keeps full size)."""
+    height, width = image.shape[:2]
+    if max_side and max(height, width) > max_side:
+        scale = max_side / max(height, width)
+        image = cv2.resize(image, (round(width * scale), round(height * scale)), interpolation=cv2.INTER_AREA)
+    if fmt == "webp":
+        ext, params = ".webp", [cv2.IMWRITE_WEBP_QUALITY, quality]
+    else:
+        ext, params = ".jpg", [cv2.IMWRITE_JPEG_QUALITY, quality]
+    ok, buffer = cv2.imencode(ext, cv2.cvtColor(image, cv2.COLOR_RGB2BGR), params)
+    if not ok:
+        raise ValueError(f"Failed to encode preview as {fmt}")
+    return buffer.tobytes()
+
+
+def mask_watermark(image: np.ndarray, mask_height: int = WATERMARK_MASK_HEIGHT) -> np.ndarray:
+    """Black out the bottom strip of the frame in place to remove the Google watermark."""
+    image[-mask_height:, :] = 0
+    return image
+
+
+def dhash(image, hash_size: int = 8) -> str:
+    """
+    Perceptual difference hash of a PIL image or RGB array as a hex string.
+    Near-identical crops (re-encoded, slightly shifted or rescaled) share a hash.
+    """
+    if isinstance(image, Image.Image):
+        gray = np.asarray(image.convert("L"))
+    else:
+        gray = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
+    small = cv2.resize(gray, (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA)
+    return np.packbits(small[:, 1:] > small[:, :-1]).tobytes().hex()
+
+
+def load_rgb_image(image) -> Image.Image:
+    """
+    Return an RGB PIL image from a file path, a PIL image or an RGB numpy array,
+    so detectors can be fed straight from memory as well as from disk.
+    """
+    if isinstance(image, Image.Image):
+        return image if image.mode == "RGB" else image.convert("RGB")
+    if isinstance(image, np.ndarray):
+        return Image.fromarray(image)
+    if isinstance(image, (str, os.PathLike)):
+        return Image.open(image).convert("RGB")
+    raise TypeError(f"Unsupported image type: {type(image).__name__}")
@@ -0,0 +1,90 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from gevent import monkey
+    from gevent.threadpool import ThreadPool as GeventThreadPool
+except ImportError:  # Scripts and tests can run without gevent
+    monkey = GeventThreadPool = None
+
+
+def _gevent_patched():
+    return monkey is not None and monkey.is_module_patched("threading")
+
+
+class InferenceExecutor:
+    """
+    Runs blocking model calls (torch, ultralytics) on native OS threads.
+
+    Under `monkey.patch_all()` every "thread" in the app is a greenlet, so a
+    long C call in detect_objects holds the gevent hub: Socket.IO heartbeats,
+    REST requests and other streams all wait for it. run() hands the call to a
+    gevent ThreadPool of real threads and only the calling greenlet waits for
+    the result; torch releases the GIL while it computes, so the hub keeps
+    serving everyone else. Without gevent it falls back to a plain
+    ThreadPoolExecutor, so the same code works in scripts.
+
+    `max_workers` bounds concurrent inferences process-wide. Keep it at 1
+    unless the models are known to be safe to call concurrently.
+    """
+
+    def __init__(self, max_workers=1):
+        self.max_workers = max(1, int(max_workers))
+        self._pool = None
+        self._lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stats = {"calls": 0, "failures": 0, "wait_total_s": 0.0, "run_total_s": 0.0, "run_max_s": 0.0}
+
+    def _get_pool(self):
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    if _gevent_patched():
+                        self._pool = GeventThreadPool(self.max_workers)
+                    else:
+                        self._pool = ThreadPoolExecutor(
+                            max_workers=self.max_workers, thread_name_prefix="inference"
+                        )
+        return self._pool
+
+    def run(self, func, *args, **kwargs):
+        """Call func(*args, **kwargs) on an inference thread and return its result (or raise its error)."""
+        submitted = time.perf_counter()
+        timing = {}
+
+        def call():
+            started = time.perf_counter()
+            timing["wait"] = started - submitted
+            try:
+                return func(*args, **kwargs)
+            finally:
+                timing["run"] = time.perf_counter() - started
+
+        pool = self._get_pool()
+        failed = False
+        try:
+            if isinstance(pool, ThreadPoolExecutor):
+                return pool.submit(call).result()
+            return pool.spawn(call).get()
+        except Exception:
+            failed = True
+            raise
+        finally:
+            self._record(timing, failed)
+
+    def _record(self, timing, failed):
+        with self._stats_lock:
+            self._stats["failures" if failed else "calls"] += 1
+            if failed:
+                return
+            self._stats["wait_total_s"] += timing.get("wait", 0.0)
+            self._stats["run_total_s"] += timing.get("run", 0.0)
+            self._stats["run_max_s"] = max(self._stats["run_max_s"], timing.get("run", 0.0))
+
+    def stats(self):
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats["run_avg_s"] = stats["run_total_s"] / stats["calls"] if stats["calls"] else 0.0
+        stats["wait_avg_s"] = stats["wait_total_s"] / stats["calls"] if stats["calls"] else 0.0
+        return stats
@@ -0,0 +1,152 @@
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+MAPS_ENDPOINTS = {
+    "geocode": "https://maps.googleapis.com/maps/api/geocode/json",
+    "streetview": "https://maps.googleapis.com/maps/api/streetview",
+    "streetview_metadata": "https://maps.googleapis.com/maps/api/streetview/metadata",
+}
+
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# JSON APIs report quota errors as HTTP 200 with this "status" in the body
+JSON_APIS = {"geocode", "streetview_metadata"}
+RETRY_BODY_STATUSES = {"OVER_QUERY_LIMIT"}
+
+
+class TokenBucket:
+    """Thread-safe token bucket refilled at `rate` tokens/second up to `capacity`."""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(1.0, rate))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Take one token, sleeping until one is available. Returns the time waited."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                delay = (1 - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+class MapsClient:
+    """
+    Shared HTTP client for the Google Maps endpoints.
+
+    A single keep-alive requests.Session is reused by every stream session in
+    the process. Concurrent requests are capped by a semaphore, each API draws
+    from its own token bucket (`rate_limits` maps API name -> requests/second),
+    and 429/5xx responses, OVER_QUERY_LIMIT bodies or connection errors are
+    retried with jittered exponential backoff. Per-API counters are available from stats().
+    """
+
+    def __init__(self, api_key, rate_limits=None, max_concurrency=8, max_retries=3,
+                 backoff=0.5, timeout=10):
+        self.api_key = api_key
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=len(MAPS_ENDPOINTS), pool_maxsize=max_concurrency)
+        self.session.mount("https://", adapter)
+        self._semaphore = threading.BoundedSemaphore(max_concurrency)
+        self._buckets = {api: TokenBucket(rate) for api, rate in (rate_limits or {}).items()}
+
+        self._stats_lock = threading.Lock()
+        self._stats = {}
+
+    def _record(self, api, **deltas):
+        with self._stats_lock:
+            stats = self._stats.setdefault(api, {
+                "requests": 0, "failures": 0, "retries": 0, "throttled": 0,
+                "throttle_wait_s": 0.0, "latency_total_s": 0.0, "latency_max_s": 0.0,
+            })
+            for name, value in deltas.items():
+                if name == "latency_s":
+                    stats["latency_total_s"] += value
+                    stats["latency_max_s"] = max(stats["latency_max_s"], value)
+                else:
+                    stats[name] += value
+
+    @staticmethod
+    def _body_status(api, response):
+        """The JSON "status" of a 200 response from a JSON API, else None."""
+        if api not in JSON_APIS or response is None or response.status_code != 200:
+            return None
+        try:
+            return response.json().get("status")
+        except ValueError:
+            return None
+
+    def get(self, api, params):
+        """
+        GET one of MAPS_ENDPOINTS with the API key added. Returns the final
+        requests.Response (which may still be an error status), or None if
+        every attempt raised.
+        """
+        url = MAPS_ENDPOINTS[api]
+        params = {**params, "key": self.api_key}
+        bucket = self._buckets.get(api)
+
+        for attempt in range(self.max_retries + 1):
+            if bucket:
+                waited = bucket.acquire()
+                if waited:
+                    self._record(api, throttled=1, throttle_wait_s=waited)
+
+            start = time.perf_counter()
+            try:
+                with self._semaphore:
+                    response = self.session.get(url, params=params, timeout=self.timeout)
+                error = None
+            except requests.RequestException as e:
+                response, error = None, e
+            self._record(api, requests=1, latency_s=time.perf_counter() - start)
+
+            body_status = self._body_status(api, response)
+            retryable = (
+                response is None or response.status_code in RETRY_STATUS_CODES
+                or body_status in RETRY_BODY_STATUSES
+            )
+            if not retryable or attempt == self.max_retries:
+                break
+
+            delay = random.uniform(0, self.backoff * (2 ** attempt))
+            if response is None:
+                reason = error
+            elif body_status in RETRY_BODY_STATUSES:
+                reason = body_status
+            else:
+                reason = f"HTTP {response.status_code}"
+            print(f"[MAPS RETRY] {api} attempt {attempt + 1} failed ({reason}); retrying in {delay:.2f}s")
+            self._record(api, retries=1)
+            time.sleep(delay)
+
+        if response is None or response.status_code != 200 or body_status in RETRY_BODY_STATUSES:
+            self._record(api, failures=1)
+        if response is None:
+            print(f"[MAPS ERROR] {api} request failed: {error}")
+        return response
+
+    def stats(self):
+        with self._stats_lock:
+            snapshot = {api: dict(stats) for api, stats in self._stats.items()}
+        for stats in snapshot.values():
+            stats["latency_avg_s"] = stats["latency_total_s"] / stats["requests"] if stats["requests"] else 0.0
+        return snapshot
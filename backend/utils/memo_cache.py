@@ -0,0 +1,100 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+class MemoCache:
+    """
+    In-memory LRU memo of JSON-serializable values, optionally persisted to a
+    table of a local SQLite file.
+
+    Lookups hit the in-memory LRU first. When `path` is set, misses fall back
+    to the SQLite table and puts are written through to it, so results
+    survive restarts. Each table keeps at most `max_entries` rows, trimmed by
+    last access like GeocodeCache. Several caches can share one file by using
+    different `table` names.
+    """
+
+    def __init__(self, table, max_entries=10000, path=None):
+        self.table = table
+        self.max_entries = max_entries
+        self.path = path
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+        if path:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with self._connect() as conn:
+                conn.execute(
+                    f"CREATE TABLE IF NOT EXISTS {table} ("
+                    " key TEXT PRIMARY KEY,"
+                    " value TEXT NOT NULL,"
+                    " accessed_at REAL NOT NULL)"
+                )
+                conn.execute(f"CREATE INDEX IF NOT EXISTS ix_{table}_accessed ON {table} (accessed_at)")
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=10)
+
+    def _remember(self, key, value):
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def get(self, key):
+        """Return the cached value, or None on a miss."""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            if self.path:
+                with self._connect() as conn:
+                    row = conn.execute(f"SELECT value FROM {self.table} WHERE key = ?", (key,)).fetchone()
+                    if row is not None:
+                        conn.execute(f"UPDATE {self.table} SET accessed_at = ? WHERE key = ?", (time.time(), key))
+                if row is not None:
+                    value = json.loads(row[0])
+                    self._remember(key, value)
+                    self.hits += 1
+                    self.disk_hits += 1
+                    return value
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        with self._lock:
+            self._remember(key, value)
+            if self.path:
+                with self._connect() as conn:
+                    conn.execute(
+                        f"INSERT OR REPLACE INTO {self.table} (key, value, accessed_at) VALUES (?, ?, ?)",
+                        (key, json.dumps(value), time.time()),
+                    )
+                    conn.execute(
+                        f"DELETE FROM {self.table} WHERE key IN ("
+                        f" SELECT key FROM {self.table} ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                        (self.max_entries,),
+                    )
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+        }
@@ -1,3 +1,4 @@
+import math
 from extensions import db
 from sqlalchemy.exc import SQLAlchemyError
 from mysql_models import (
@@ -13,6 +14,8 @@ from config import Config
 
 text_labels = Config.ALLOWED_KEYWORDS
 
+EARTH_RADIUS_M = 6371000.0
+
 
 def get_detected_type(label: str) -> DetectionType:
     label = label.lower()
@@ -29,14 +32,76 @@ def get_detected_type(label: str) -> DetectionType:
         raise ValueError(f"Unknown label: {label}")
 
 
+def detection_types_of(output):
+    """Detection types present in a detector output, skipping labels we cannot map."""
+    types = set()
+    for res in output:
+        try:
+            types.add(get_detected_type(res["label"]))
+        except ValueError:
+            pass
+    return types
+
+
+def haversine_m(lat1, lon1, lat2, lon2):
+    """Great-circle distance between two coordinates in meters."""
+    lat1, lon1, lat2, lon2 = map(math.radians, (float(lat1), float(lon1), float(lat2), float(lon2)))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(math.sqrt(a))
+
+
+def radius_to_degrees(latitude, radius_m):
+    """(lat_delta, lon_delta) in degrees of a box enclosing a circle of radius_m around latitude."""
+    lat_delta = math.degrees(radius_m / EARTH_RADIUS_M)
+    lon_delta = lat_delta / max(math.cos(math.radians(float(latitude))), 1e-6)
+    return lat_delta, lon_delta
+
+
+def find_nearby_event(latitude, longitude, detection_types, radius_m=Config.EVENT_CLUSTER_RADIUS_M):
+    """
+    Return the nearest DetectionEvent within radius_m that already holds a
+    detection of one of `detection_types`, or None.
+
+    The bounding-box prefilter on (latitude, longitude) is served by the
+    uq_lat_lon index, so only the few events around the point are read;
+    haversine then trims the box corners.
+    """
+    if not detection_types or radius_m <= 0:
+        return None
+    lat_delta, lon_delta = radius_to_degrees(latitude, radius_m)
+    candidates = (
+        db.session.query(DetectionEvent.id, DetectionEvent.latitude, DetectionEvent.longitude)
+        .join(DetectionImage, DetectionImage.event_id == DetectionEvent.id)
+        .join(DetectionMetadata, DetectionMetadata.image_id == DetectionImage.id)
+        .filter(
+            DetectionEvent.latitude.between(round(latitude - lat_delta, 6), round(latitude + lat_delta, 6)),
+            DetectionEvent.longitude.between(round(longitude - lon_delta, 6), round(longitude + lon_delta, 6)),
+            DetectionMetadata.type.in_(list(detection_types)),
+        )
+        .distinct()
+        .all()
+    )
+    best_id, best_distance = None, radius_m
+    for event_id, event_lat, event_lon in candidates:
+        distance = haversine_m(latitude, longitude, event_lat, event_lon)
+        if distance <= best_distance:
+            best_id, best_distance = event_id, distance
+    return db.session.get(DetectionEvent, best_id) if best_id is not None else None
+
+
 def register_anomaly_to_db(
     latitude, longitude, address, direction, image_url, output, caption=None
 ):
     try:
-        # Step 1: Check if an event with the same (lat, lon) exists
+        # Step 1: Check if an event with the same (lat, lon) exists, otherwise
+        # attach to the nearest event of the same type within the cluster radius
         existing_event = DetectionEvent.query.filter_by(
             latitude=latitude, longitude=longitude
         ).first()
+        if existing_event is None:
+            existing_event = find_nearby_event(
+                float(latitude), float(longitude), detection_types_of(output)
+            )
 
         if existing_event:
             new_event_id = existing_event.id
@@ -0,0 +1,45 @@
+from concurrent.futures import ThreadPoolExecutor
+
+# Metadata statuses meaning there is definitely no imagery at the location
+NO_IMAGERY_STATUSES = {"ZERO_RESULTS", "NOT_FOUND"}
+
+
+def resolve_panoramas(coords, lookup, max_workers=8):
+    """
+    Resolve each route coordinate to its Street View panorama before any image
+    is downloaded, dropping points without imagery and points that snap to a
+    panorama already covered by an earlier point.
+
+    `lookup(lat, lon)` returns the parsed Street View metadata dict
+    ({"status": ..., "pano_id": ...}) or None when the request itself failed.
+    Tests can pass a local stub instead of the metadata endpoint. Points whose
+    lookup failed are kept, since we cannot tell whether they have imagery.
+
+    Returns (waypoints, stats) where each waypoint is
+    {"idx", "lat", "lon", "pano_id"} and `idx` is the coordinate's original
+    position on the route.
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        metadata = list(executor.map(lambda coord: lookup(*coord), coords))
+
+    waypoints = []
+    seen_panos = set()
+    stats = {"points": len(coords), "no_imagery": 0, "duplicates": 0, "unresolved": 0}
+    for idx, ((lat, lon), meta) in enumerate(zip(coords, metadata)):
+        pano_id = None
+        if meta is None:
+            stats["unresolved"] += 1
+        elif meta.get("status") in NO_IMAGERY_STATUSES:
+            stats["no_imagery"] += 1
+            continue
+        else:
+            pano_id = meta.get("pano_id")
+            if pano_id in seen_panos:
+                stats["duplicates"] += 1
+                continue
+            if pano_id:
+                seen_panos.add(pano_id)
+        waypoints.append({"idx": idx, "lat": lat, "lon": lon, "pano_id": pano_id})
+
+    stats["panoramas"] = len(waypoints)
+    return waypoints, stats
@@ -0,0 +1,114 @@
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import boto3
+from botocore.config import Config as BotoConfig
+from botocore.exceptions import BotoCoreError, ClientError
+
+
+class S3Uploader:
+    """
+    Shared S3 upload service used by the live stream.
+
+    One boto3 client with a connection pool sized to the worker pool is reused
+    for every request. Uploads take in-memory bytes and run on background
+    workers with retries and exponential backoff, returning a Future that
+    resolves to the object URL (or None once retries are exhausted).
+
+    Pass `endpoint_url` (e.g. a local MinIO or moto server) or an existing
+    `client` to run against an S3 stand-in instead of AWS.
+    """
+
+    def __init__(self, bucket_name, max_workers=8, max_retries=3, backoff=0.5,
+                 endpoint_url=None, client=None):
+        self.bucket_name = bucket_name
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.endpoint_url = endpoint_url
+        self._client = client
+        self._client_lock = threading.Lock()
+        self._max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="s3-upload")
+
+    @property
+    def client(self):
+        # boto3 clients are thread-safe once created, but creation itself is not
+        with self._client_lock:
+            if self._client is None:
+                self._client = boto3.client(
+                    "s3",
+                    endpoint_url=self.endpoint_url,
+                    config=BotoConfig(max_pool_connections=self._max_workers * 2),
+                )
+            return self._client
+
+    def url_for(self, key):
+        if self.endpoint_url:
+            return f"{self.endpoint_url.rstrip('/')}/{self.bucket_name}/{key}"
+        return f"https://{self.bucket_name}.s3.amazonaws.com/{key}"
+
+    def _with_retries(self, description, call):
+        for attempt in range(self.max_retries + 1):
+            try:
+                return call()
+            except (BotoCoreError, ClientError) as e:
+                if attempt == self.max_retries:
+                    print(f"Failed to {description} after {attempt + 1} attempts: {e}")
+                    raise
+                delay = self.backoff * (2 ** attempt) * (1 + random.random())
+                print(f"Retrying {description} in {delay:.2f}s: {e}")
+                time.sleep(delay)
+
+    # ===== Uploads =====
+    def _upload(self, content, key, content_type):
+        try:
+            self._with_retries(
+                f"upload {key}",
+                lambda: self.client.put_object(
+                    Bucket=self.bucket_name, Key=key, Body=content, ContentType=content_type
+                ),
+            )
+        except (BotoCoreError, ClientError):
+            return None
+        url = self.url_for(key)
+        print(f"Uploaded to S3: {url}")
+        return url
+
+    def upload_bytes(self, content, key, content_type="image/jpeg"):
+        """Queue an upload of in-memory bytes and return a Future of the object URL."""
+        return self._executor.submit(self._upload, content, key, content_type)
+
+    # ===== Cleanup =====
+    def _delete_prefix(self, prefix, keep_prefix=None):
+        deleted = 0
+        paginator = self.client.get_paginator("list_objects_v2")
+        try:
+            for page in paginator.paginate(Bucket=self.bucket_name, Prefix=prefix):
+                keys = [
+                    {"Key": obj["Key"]} for obj in page.get("Contents", [])
+                    if not (keep_prefix and obj["Key"].startswith(keep_prefix))
+                ]
+                if not keys:
+                    continue
+                # list_objects_v2 pages hold at most 1000 keys, matching the delete_objects limit
+                self._with_retries(
+                    f"delete {len(keys)} objects under {prefix}",
+                    lambda: self.client.delete_objects(
+                        Bucket=self.bucket_name, Delete={"Objects": keys, "Quiet": True}
+                    ),
+                )
+                deleted += len(keys)
+        except (BotoCoreError, ClientError) as e:
+            print(f"Error deleting S3 folder {prefix}: {e}")
+        print(f"Deleted {deleted} objects from {prefix}")
+        return deleted
+
+    def delete_prefix(self, prefix, keep_prefix=None):
+        """
+        Delete every object under `prefix` in the background, page by page.
+        Keys under `keep_prefix` are left alone so an active session can keep
+        writing below the prefix being cleaned. Returns a Future of the count.
+        """
+        return self._executor.submit(self._delete_prefix, prefix, keep_prefix)
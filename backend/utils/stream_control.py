@@ -0,0 +1,88 @@
+import threading
+import time
+
+
+class StreamControl:
+    """
+    Run-time controls shared between the socket handlers and the pipeline
+    stages of one live stream session.
+
+    - stop(): end the run; stages notice before their next frame.
+    - pause() / resume(): hold every stage before its next frame without
+      losing the work already in the queues.
+    - max_fps: upper bound on frames emitted per second, declared by the client.
+    - max_inflight: when the client acknowledges frames (ack()), at most this
+      many frames may be emitted but not yet acknowledged. The emit stage then
+      blocks, and the bounded queues push that back to the fetch stage, so a
+      slow browser does not make the server buffer frames and uploads.
+    """
+
+    def __init__(self, max_fps=None, max_inflight=None):
+        self.stop_event = threading.Event()
+        self.max_fps = max_fps
+        self.max_inflight = max_inflight
+        self.emitted = 0
+        self.acked = 0
+        self._running = threading.Event()
+        self._running.set()
+        self._cond = threading.Condition()
+        self._last_emit = 0.0
+
+    @property
+    def stopped(self):
+        return self.stop_event.is_set()
+
+    @property
+    def paused(self):
+        return not self._running.is_set()
+
+    @property
+    def inflight(self):
+        # A stale cumulative count (e.g. from a previous run) must not open extra slots
+        return max(0, self.emitted - self.acked)
+
+    def stop(self):
+        self.stop_event.set()
+        self._running.set()
+        with self._cond:
+            self._cond.notify_all()
+
+    def pause(self):
+        self._running.clear()
+
+    def resume(self):
+        self._running.set()
+
+    def proceed(self):
+        """Block while paused. Returns False once the run has been stopped."""
+        while not self._running.wait(timeout=0.5):
+            pass
+        return not self.stopped
+
+    def ack(self, received):
+        """Record that the client has received `received` frames of this run in total."""
+        with self._cond:
+            self.acked = max(self.acked, int(received))
+            self._cond.notify_all()
+
+    def wait_for_emit_slot(self):
+        """
+        Block until the next frame may be emitted under the pause, in-flight
+        and frame rate limits. Returns False once the run has been stopped.
+        """
+        if not self.proceed():
+            return False
+        if self.max_inflight:
+            with self._cond:
+                while self.inflight >= self.max_inflight and not self.stopped:
+                    self._cond.wait(timeout=0.5)
+        if self.max_fps:
+            delay = self._last_emit + 1.0 / self.max_fps - time.monotonic()
+            if delay > 0:
+                self.stop_event.wait(delay)
+        return not self.stopped
+
+    def frame_emitted(self):
+        with self._cond:
+            self.emitted += 1
+        self._last_emit = time.monotonic()
@@ -0,0 +1,136 @@
+import queue
+import threading
+import traceback
+
+# Sentinel telling a stage worker that no more items are coming
+_STOP = object()
+
+
+class Stage:
+    """
+    One step of a StreamPipeline.
+
+    `func` receives an item and returns the (possibly updated) item, or None
+    to drop it. The stage reads from a bounded queue of `maxsize` items and
+    runs `workers` threads, so a slow stage blocks the ones in front of it
+    instead of letting work pile up in memory.
+
+    An `ordered` stage hands items to `func` in the order they entered the
+    pipeline, regardless of the order earlier stages finished them. It must
+    run with a single worker.
+    """
+
+    def __init__(self, name, func, workers=1, maxsize=4, ordered=False):
+        if ordered and workers != 1:
+            raise ValueError(f"Ordered stage '{name}' must run with exactly one worker")
+        self.name = name
+        self.func = func
+        self.workers = max(1, int(workers))
+        self.maxsize = max(1, int(maxsize))
+        self.ordered = ordered
+
+
+class StreamPipeline:
+    """
+    Bounded-queue pipeline that runs each Stage on its own worker threads.
+
+    Items travel as (seq, item) envelopes. When a stage drops an item (returns
+    None or raises) a (seq, None) tombstone keeps flowing downstream so that
+    ordered stages never wait for a sequence number that will not arrive.
+
+    Setting `stop_event` stops feeding new items; items already in flight are
+    turned into tombstones at the next stage, so the pipeline drains quickly.
+    """
+
+    def __init__(self, stages, stop_event=None):
+        if not stages:
+            raise ValueError("StreamPipeline needs at least one stage")
+        self.stages = stages
+        self.stop_event = stop_event or threading.Event()
+        self.queues = [queue.Queue(maxsize=stage.maxsize) for stage in stages]
+        self._remaining = [stage.workers for stage in stages]
+        self._lock = threading.Lock()
+
+    def run(self, items):
+        """Feed `items` through every stage and block until the last stage finishes."""
+        threads = []
+        for index, stage in enumerate(self.stages):
+            target = self._ordered_worker if stage.ordered else self._worker
+            for n in range(stage.workers):
+                thread = threading.Thread(
+                    target=target, args=(index,), name=f"{stage.name}-{n}", daemon=True
+                )
+                thread.start()
+                threads.append(thread)
+
+        try:
+            for seq, item in enumerate(items):
+                if self.stop_event.is_set():
+                    break
+                self.queues[0].put((seq, item))
+        finally:
+            for _ in range(self.stages[0].workers):
+                self.queues[0].put(_STOP)
+
+        for thread in threads:
+            thread.join()
+
+    def queue_depths(self):
+        """Number of items waiting in front of each stage."""
+        return {stage.name: q.qsize() for stage, q in zip(self.stages, self.queues)}
+
+    # ===== Internals =====
+    def _call(self, stage, seq, item):
+        if self.stop_event.is_set():
+            return None
+        try:
+            return stage.func(item)
+        except Exception as e:
+            print(f"[PIPELINE] Stage '{stage.name}' failed on item {seq}: {e}")
+            traceback.print_exc()
+            return None
+
+    def _forward(self, index, envelope):
+        if index + 1 < len(self.queues):
+            self.queues[index + 1].put(envelope)
+
+    def _finish(self, index):
+        """Called once per exiting worker; the last one out stops the next stage."""
+        with self._lock:
+            self._remaining[index] -= 1
+            last = self._remaining[index] == 0
+        if last and index + 1 < len(self.stages):
+            for _ in range(self.stages[index + 1].workers):
+                self.queues[index + 1].put(_STOP)
+
+    def _worker(self, index):
+        stage = self.stages[index]
+        inbox = self.queues[index]
+        while True:
+            envelope = inbox.get()
+            if envelope is _STOP:
+                break
+            seq, item = envelope
+            if item is not None:
+                item = self._call(stage, seq, item)
+            self._forward(index, (seq, item))
+        self._finish(index)
+
+    def _ordered_worker(self, index):
+        stage = self.stages[index]
+        inbox = self.queues[index]
+        pending = {}
+        next_seq = 0
+        while True:
+            envelope = inbox.get()
+            if envelope is _STOP:
+                break
+            seq, item = envelope
+            pending[seq] = item
+            while next_seq in pending:
+                item = pending.pop(next_seq)
+                if item is not None:
+                    item = self._call(stage, next_seq, item)
+                self._forward(index, (next_seq, item))
+                next_seq += 1
+        self._finish(index)
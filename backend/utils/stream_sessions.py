@@ -0,0 +1,117 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+
+class StreamSessionStore:
+    """
+    Persistent checkpoints for live stream sessions, kept in a local SQLite file.
+
+    Each session stores the parameters it was started with, its status
+    (running, paused, stopped, completed) and the last frame delivered to the client as
+    (waypoint index, direction). A resumed session picks up right after that
+    frame instead of restarting the route.
+
+    The persist stage runs ahead of delivery, so frames are also recorded
+    once they are uploaded and registered (mark_persisted). A resumed session
+    reuses those instead of uploading and registering them a second time.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS stream_sessions ("
+                " id TEXT PRIMARY KEY,"
+                " user_id INTEGER NOT NULL,"
+                " params TEXT NOT NULL,"
+                " status TEXT NOT NULL,"
+                " last_waypoint INTEGER NOT NULL DEFAULT -1,"
+                " last_direction TEXT,"
+                " created_at REAL NOT NULL,"
+                " updated_at REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS stream_persisted_frames ("
+                " session_id TEXT NOT NULL,"
+                " waypoint INTEGER NOT NULL,"
+                " direction TEXT NOT NULL,"
+                " url TEXT,"
+                " PRIMARY KEY (session_id, waypoint, direction))"
+            )
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=10)
+
+    def create(self, user_id, params):
+        """Register a new running session and return its ID."""
+        session_id = uuid.uuid4().hex
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT INTO stream_sessions (id, user_id, params, status, created_at, updated_at)"
+                " VALUES (?, ?, ?, 'running', ?, ?)",
+                (session_id, user_id, json.dumps(params), now, now),
+            )
+        return session_id
+
+    def get(self, session_id):
+        """Return the session as a dict, or None if it does not exist."""
+        with self._lock, self._connect() as conn:
+            row = conn.execute(
+                "SELECT id, user_id, params, status, last_waypoint, last_direction"
+                " FROM stream_sessions WHERE id = ?",
+                (session_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            "id": row[0],
+            "user_id": row[1],
+            "params": json.loads(row[2]),
+            "status": row[3],
+            "last_waypoint": row[4],
+            "last_direction": row[5],
+        }
+
+    def checkpoint(self, session_id, waypoint_idx, direction):
+        """Record the last frame delivered to the client."""
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "UPDATE stream_sessions SET last_waypoint = ?, last_direction = ?, updated_at = ?"
+                " WHERE id = ?",
+                (waypoint_idx, direction, time.time(), session_id),
+            )
+
+    def mark_persisted(self, session_id, waypoint_idx, direction, url):
+        """Record that a frame has been uploaded (to `url`, None if not uploaded) and registered."""
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO stream_persisted_frames (session_id, waypoint, direction, url)"
+                " VALUES (?, ?, ?, ?)",
+                (session_id, waypoint_idx, direction, url),
+            )
+
+    def persisted(self, session_id, waypoint_idx):
+        """{direction: url} of the frames of a waypoint already persisted by an earlier run."""
+        with self._lock, self._connect() as conn:
+            rows = conn.execute(
+                "SELECT direction, url FROM stream_persisted_frames WHERE session_id = ? AND waypoint = ?",
+                (session_id, waypoint_idx),
+            ).fetchall()
+        return dict(rows)
+
+    def set_status(self, session_id, status):
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "UPDATE stream_sessions SET status = ?, updated_at = ? WHERE id = ?",
+                (status, time.time(), session_id),
+            )
@@ -0,0 +1,122 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+
+class StreetViewCache:
+    """
+    On-disk cache of raw Street View JPEG bytes with LRU eviction.
+
+    Each entry is one file named after the hash of its request parameters
+    (lat, lon, heading, fov, pitch, size). The LRU order is kept in memory and
+    mirrored in file modification times, so it survives restarts. Once the
+    files exceed `max_bytes`, the least recently used ones are deleted.
+
+    In `cache_only` mode a miss returns None instead of calling the network,
+    which lets a previously scanned route be replayed offline.
+    """
+
+    def __init__(self, directory, max_bytes=2 * 1024 ** 3, cache_only=False):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.cache_only = cache_only
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.total_bytes = 0
+        self._entries = OrderedDict()  # key -> size in bytes, least recently used first
+        self._lock = threading.Lock()
+
+        os.makedirs(directory, exist_ok=True)
+        self._load_index()
+
+    def _load_index(self):
+        files = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(".jpg"):
+                continue
+            stat = os.stat(os.path.join(self.directory, name))
+            files.append((stat.st_mtime, name[:-4], stat.st_size))
+        for _, key, size in sorted(files):
+            self._entries[key] = size
+            self.total_bytes += size
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.jpg")
+
+    @staticmethod
+    def key(lat, lon, heading, fov, pitch, size):
+        raw = f"{float(lat):.6f},{float(lon):.6f},{heading},{fov},{pitch},{size}"
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def get(self, lat, lon, heading, fov, pitch, size):
+        """Return cached JPEG bytes for the request, or None on a miss."""
+        key = self.key(lat, lon, heading, fov, pitch, size)
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return None
+            try:
+                with open(self._path(key), "rb") as f:
+                    content = f.read()
+                os.utime(self._path(key))
+            except OSError:
+                # File removed behind our back; forget it
+                self.total_bytes -= self._entries.pop(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return content
+
+    def put(self, lat, lon, heading, fov, pitch, size, content):
+        """Store JPEG bytes for the request and evict least recently used files over budget."""
+        if len(content) > self.max_bytes:
+            return
+        key = self.key(lat, lon, heading, fov, pitch, size)
+        path = self._path(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with self._lock:
+            with open(tmp_path, "wb") as f:
+                f.write(content)
+            os.replace(tmp_path, path)
+
+            self.total_bytes -= self._entries.pop(key, 0)
+            self._entries[key] = len(content)
+            self.total_bytes += len(content)
+
+            while self.total_bytes > self.max_bytes and self._entries:
+                old_key, old_size = self._entries.popitem(last=False)
+                self.total_bytes -= old_size
+                self.evictions += 1
+                try:
+                    os.remove(self._path(old_key))
+                except OSError:
+                    pass
+
+    def get_or_fetch(self, lat, lon, heading, fov, pitch, size, fetch, cache_only=None):
+        """
+        Return cached bytes for the request, calling `fetch()` on a miss unless
+        running cache-only. Failed fetches (None) are not stored.
+        """
+        content = self.get(lat, lon, heading, fov, pitch, size)
+        if content is not None:
+            return content
+        if self.cache_only if cache_only is None else cache_only:
+            return None
+        content = fetch()
+        if content is not None:
+            self.put(lat, lon, heading, fov, pitch, size, content)
+        return content
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "bytes": self.total_bytes,
+        }
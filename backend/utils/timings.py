@@ -0,0 +1,19 @@
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+
+def add_timing(timings: Optional[Dict], key: str, value: float):
+    """Accumulate `value` under `key`; no-op when the caller passed no timings dict."""
+    if timings is not None:
+        timings[key] = timings.get(key, 0) + value
+
+
+@contextmanager
+def timed(timings: Optional[Dict], key: str):
+    """Add the seconds spent inside the block to timings[key]."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        add_timing(timings, key, time.perf_counter() - start)
@@ -1,9 +1,18 @@
-import React, { useEffect, useState } from "react";
+import React, { useEffect, useRef, useState } from "react";
 import { Dropdown, Tab, Segment, Input, Form, Button, Icon, Loader } from "semantic-ui-react";
 import axios from "axios";
 import { io } from "socket.io-client";
 
 const socket = io(process.env.REACT_APP_SOCKET_BACKEND || "http://localhost:8000");
+// Upper bound on frames per second the server may push to this window
+const STREAM_MAX_FPS = 4;
+
+// Frames without an S3 URL arrive as binary thumbnails; show them through object URLs
+const toImageData = ({ image, imageType, ...data }) =>
+  image ? { ...data, url: URL.createObjectURL(new Blob([image], { type: imageType })), objectUrl: true } : data;
+
+const revokeObjectUrls = (imageList) =>
+  Object.values(imageList).flat().forEach((img) => img.objectUrl && URL.revokeObjectURL(img.url));
 
 const LiveStreamWindow = ({
   setCarLat,
@@ -31,6 +40,12 @@ const LiveStreamWindow = ({
   const [numPoints, setNumPoints] = useState("");
   const [params, setParams] = useState(null);
   const [selectedModel, setSelectedModel] = useState("dino");
+  // Active stream session, resumed from its server-side checkpoint after a reconnect
+  const sessionRef = useRef(null);
+  // Frames received in the current server run; every new run (start or resume) counts from 0
+  const runRef = useRef(null);
+  const receivedRef = useRef(0);
+  const [streamStatus, setStreamStatus] = useState(null);
 
   const directions = ["front", "back", "left", "right"];
 
@@ -46,7 +61,11 @@ const LiveStreamWindow = ({
     if (!params) return;
 
     setLoading(true);
-    setImageList({ front: [], back: [], left: [], right: [] });
+    setImageList((prev) => {
+      revokeObjectUrls(prev);
+      return { front: [], back: [], left: [], right: [] };
+    });
+    receivedRef.current = 0;
 
     socket.emit("start_stream", {
       userId: localStorage.getItem("user_id"),
@@ -56,6 +75,9 @@ const LiveStreamWindow = ({
       endLngInput: params.endLngInput,
       num_points: params.points,
       model: params.model,
+      max_fps: STREAM_MAX_FPS,
+      ack_frames: true,
+      preview: "binary",
     });
   }, [params]);
 
@@ -64,13 +86,57 @@ const LiveStreamWindow = ({
       const { direction, ...imageData } = data;
       setImageList((prev) => ({
         ...prev,
-        [direction]: [...prev[direction], imageData],
+        [direction]: [...prev[direction], toImageData(imageData)],
       }));
       setLoading(false);
       setIsPlaying(true);
+      receivedRef.current += 1;
+      if (sessionRef.current) {
+        socket.emit("frame_ack", {
+          sessionId: sessionRef.current,
+          runId: runRef.current,
+          received: receivedRef.current,
+        });
+      }
+    });
+
+    // Frames skipped by the server-side quality gate keep their slot in the grid, with the reason
+    socket.on("frame_gated", ({ direction, lat, lon, reason }) => {
+      setImageList((prev) => ({
+        ...prev,
+        [direction]: [...prev[direction], { lat, lon, gated: reason }],
+      }));
+      setLoading(false);
+      setIsPlaying(true);
+    });
+
+    socket.on("stream_session", ({ sessionId, status, runId }) => {
+      if (runId && runId !== runRef.current) {
+        runRef.current = runId;
+        receivedRef.current = 0;
+      }
+      sessionRef.current = status === "running" || status === "paused" ? sessionId : null;
+      setStreamStatus(sessionRef.current ? status : null);
+      if (status === "stopped" || status === "completed") setLoading(false);
+    });
+
+    socket.on("stream_status", ({ paused }) => {
+      if (paused) setStreamStatus("paused");
     });
 
-    return () => socket.off("start_stream");
+    socket.on("connect", () => {
+      if (sessionRef.current) {
+        socket.emit("resume_stream", { sessionId: sessionRef.current });
+      }
+    });
+
+    return () => {
+      socket.off("start_stream");
+      socket.off("frame_gated");
+      socket.off("stream_session");
+      socket.off("stream_status");
+      socket.off("connect");
+    };
   }, []);
 
   // ✅ PLAYBACK LOOP
@@ -118,6 +184,17 @@ const LiveStreamWindow = ({
   };
 
 
+  // ✅ STREAM CONTROLS
+  const handleStop = () => {
+    if (!sessionRef.current) return;
+    socket.emit("stop_stream", { sessionId: sessionRef.current });
+  };
+
+  const handlePauseResume = () => {
+    if (!sessionRef.current) return;
+    socket.emit(streamStatus === "paused" ? "resume_stream" : "pause_stream", { sessionId: sessionRef.current });
+  };
+
   // ✅ HANDLE IMAGE NAVIGATION
   const handlePrev = () => {
     setIsPlaying(false);
@@ -181,6 +258,14 @@ const LiveStreamWindow = ({
                   style={{ width: "100%", height: "auto", objectFit: "contain" }}
                 />
                 {renderBoundingBoxes(boxes, imageData?.labels, imageData?.scores)}
+                {imageData?.gated && (
+                  <div style={{
+                    position: "absolute", top: "10px", left: "10px", zIndex: 6, padding: "4px 8px",
+                    backgroundColor: "rgba(0, 0, 0, 0.6)", color: "white", fontSize: "12px", borderRadius: "4px",
+                  }}>
+                    Frame skipped by quality gate: {imageData.gated}
+                  </div>
+                )}
               </div>
             )}
           </div>
@@ -270,6 +355,7 @@ const LiveStreamWindow = ({
                   { key: "dino", text: "GroundingDINO", value: "dino" },
                   { key: "owlvit", text: "OWL-ViT", value: "owlvit" },
                   { key: "yolo", text: "YOLO-v8", value: "yolo" },
+                  { key: "cascade", text: "Cascade (YOLO → GroundingDINO)", value: "cascade" },
                 ]}
                 value={selectedModel}
                 onChange={(e, { value }) => setSelectedModel(value)}
@@ -279,6 +365,12 @@ const LiveStreamWindow = ({
             {/* ✅ BUTTON ROW */}
             <div style={{ display: "flex", gap: "10px", marginTop: "10px" }}>
               <Button primary type="submit">Update Stream</Button>
+              <Button type="button" onClick={handlePauseResume} disabled={!streamStatus}>
+                {streamStatus === "paused" ? "Resume Stream" : "Pause Stream"}
+              </Button>
+              <Button type="button" onClick={handleStop} disabled={!streamStatus}>
+                Stop Stream
+              </Button>
               <Button
                 type="button"
                 color={coordSelect ? "red" : "red"}
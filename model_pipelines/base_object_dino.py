@@ -6,6 +6,9 @@ import matplotlib.pyplot as plt
 from torchvision.ops import box_iou
 from transformers import AutoProcessor, AutoModelForZeroShotObjectDetection
 
+from box_ops import dedup_indices
+from feature_cache import cache_text_backbone, encode_prompts, reuse_image_features
+
 
 def load_labels(json_path: str) -> list[str]:
     """Load label list from JSON file."""
@@ -21,6 +24,7 @@ def load_model(model_name="IDEA-Research/grounding-dino-base") -> tuple:
     processor = AutoProcessor.from_pretrained(model_name)
     model = AutoModelForZeroShotObjectDetection.from_pretrained(model_name).to(device)
     model.eval()
+    cache_text_backbone(model)
     return processor, model, device
 
 
@@ -32,71 +36,63 @@ def process_image_with_batches(
     device,
     box_threshold: float = 0.35,
     text_threshold: float = 0.25,
+    text_inputs: list = None,
+    reuse_features: bool = True,
 ) -> list[dict]:
+    """
+    Run every label batch on one image. The image is preprocessed once and,
+    with `reuse_features`, its backbone features are computed once and shared
+    by all label batches; pass `text_inputs` from encode_prompts() to also
+    reuse the tokenized prompts across images.
+    """
     image = Image.open(image_path).convert("RGB")
+    image_inputs = processor.image_processor(images=image, return_tensors="pt").to(device)
+    if text_inputs is None:
+        text_inputs = encode_prompts(processor, label_batches, device)
     all_detections = []
 
-    for labels in label_batches:
-        inputs = processor(images=image, text=labels, return_tensors="pt").to(device)
-        with torch.no_grad():
-            outputs = model(**inputs)
-
-        target_sizes = torch.tensor([image.size[::-1]], device=device)
-        results = processor.post_process_grounded_object_detection(
-            outputs=outputs,
-            input_ids=inputs["input_ids"],
-            target_sizes=target_sizes,
-            box_threshold=box_threshold,
-            text_threshold=text_threshold,
-        )[0]
-
-        for box, score, label in zip(
-            results["boxes"], results["scores"], results["labels"]
-        ):
-            all_detections.append(
-                {
-                    "label": label,
-                    "score": float(score),
-                    "box": [round(x, 2) for x in box.tolist()],
-                }
-            )
+    with torch.no_grad(), reuse_image_features(model, reuse_features):
+        for inputs in text_inputs:
+            outputs = model(**image_inputs, **inputs)
+
+            target_sizes = torch.tensor([image.size[::-1]], device=device)
+            results = processor.post_process_grounded_object_detection(
+                outputs=outputs,
+                input_ids=inputs["input_ids"],
+                target_sizes=target_sizes,
+                box_threshold=box_threshold,
+                text_threshold=text_threshold,
+            )[0]
+
+            for box, score, label in zip(
+                results["boxes"], results["scores"], results["labels"]
+            ):
+                all_detections.append(
+                    {
+                        "label": label,
+                        "score": float(score),
+                        "box": [round(x, 2) for x in box.tolist()],
+                    }
+                )
 
     return all_detections
 
 
 def deduplicate_detections(detections: list[dict], iou_threshold=0.95) -> list[dict]:
-    final_detections = []
-    used = [False] * len(detections)
-
-    for i, det1 in enumerate(detections):
-        if used[i]:
-            continue
-        box1 = torch.tensor(det1["box"]).unsqueeze(0)
-        duplicate_indices = [i]
-
-        for j in range(i + 1, len(detections)):
-            if used[j] or det1["label"] != detections[j]["label"]:
-                continue
-            box2 = torch.tensor(detections[j]["box"]).unsqueeze(0)
-            iou = box_iou(box1, box2).item()
-            if iou >= iou_threshold:
-                duplicate_indices.append(j)
-
-        best_idx = max(duplicate_indices, key=lambda idx: detections[idx]["score"])
-        final_detections.append(detections[best_idx])
-        for idx in duplicate_indices:
-            used[idx] = True
-
-    # Remove literal duplicates (label + rounded box)
-    unique = []
-    seen = set()
-    for det in final_detections:
-        key = (det["label"], tuple(round(x, 2) for x in det["box"]))
-        if key not in seen:
-            seen.add(key)
-            unique.append(det)
-
-    return unique
+    """
+    Merge same-label detections whose boxes overlap by IoU >= iou_threshold,
+    keeping the highest-scoring one, then drop literal duplicates
+    (label + rounded box). One batched call per image, see box_ops.dedup_indices.
+    """
+    if not detections:
+        return []
+    keep = dedup_indices(
+        [det["box"] for det in detections],
+        [det["score"] for det in detections],
+        [det["label"] for det in detections],
+        iou_threshold,
+    )
+    return [detections[i] for i in keep]
 
 
 def draw_boxes(image_path: str, detections: list[dict], save_to: str = None):
@@ -146,18 +142,22 @@ def process_images_dir(
     text_threshold: float = 0.4,
     visualize: bool = False,
     save_dir: str = None,
+    reuse_features: bool = True,
 ) -> dict[str, list[dict]]:
     """
     Run detection on all images in a directory.
     Optionally draw/save annotated images.
     """
     results = {}
+    text_inputs = encode_prompts(processor, labels, device)
+    # Room for every label batch, so the LRU never evicts one the next image needs
+    cache_text_backbone(model, max_entries=len(text_inputs))
     for fname in os.listdir(images_dir):
         if not fname.lower().endswith((".jpg", ".jpeg", ".png")):
             continue
         path = os.path.join(images_dir, fname)
         raw_detections = process_image_with_batches(
-            path, labels, processor, model, device, box_threshold, text_threshold
+            path, labels, processor, model, device, box_threshold, text_threshold, text_inputs, reuse_features
         )
         detections = deduplicate_detections(raw_detections, iou_threshold=0.85)
 
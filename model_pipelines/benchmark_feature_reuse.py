@@ -0,0 +1,104 @@
+"""
+CPU benchmark of process_image_with_batches with and without image-feature
+reuse across label batches.
+
+"per-batch" is the original loop: the processor and the full Grounding DINO
+forward (image preprocessing + Swin backbone + text-conditioned
+encoder/decoder) once per label batch. "reuse" preprocesses the image once
+and runs the backbone once per image, so only the text-conditioned layers
+run per label batch. Detections must agree up to --score-tol.
+
+Usage:
+    python benchmark_feature_reuse.py --images test_image --labels distinct_base_objects.json
+"""
+import argparse
+import os
+import time
+
+import torch
+from PIL import Image
+
+from base_object_dino import load_labels, load_model, process_image_with_batches
+
+
+def process_per_batch(image_path, label_batches, processor, model, device, box_threshold, text_threshold):
+    """The original loop: preprocess the image and run the full model for every label batch."""
+    image = Image.open(image_path).convert("RGB")
+    detections = []
+    backbone = model.model.text_backbone
+    # Also bypass the text-encoding memo so this is the loop as it was
+    model.model.text_backbone = getattr(backbone, "backbone", backbone)
+    try:
+        for labels in label_batches:
+            inputs = processor(images=image, text=labels, return_tensors="pt").to(device)
+            with torch.no_grad():
+                outputs = model(**inputs)
+            results = processor.post_process_grounded_object_detection(
+                outputs=outputs,
+                input_ids=inputs["input_ids"],
+                target_sizes=torch.tensor([image.size[::-1]], device=device),
+                box_threshold=box_threshold,
+                text_threshold=text_threshold,
+            )[0]
+            for box, score, label in zip(results["boxes"], results["scores"], results["labels"]):
+                detections.append({"label": label, "score": float(score), "box": [round(x, 2) for x in box.tolist()]})
+    finally:
+        model.model.text_backbone = backbone
+    return detections
+
+
+def agree(reference, candidate, score_tol):
+    if len(reference) != len(candidate):
+        return False
+    for ref, cand in zip(reference, candidate):
+        if ref["label"] != cand["label"] or abs(ref["score"] - cand["score"]) > score_tol:
+            return False
+        if max(abs(a - b) for a, b in zip(ref["box"], cand["box"])) > 0.5:
+            return False
+    return True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--images", default="test_image")
+    parser.add_argument("--labels", default="distinct_base_objects.json")
+    parser.add_argument("--limit", type=int, default=5, help="number of images")
+    parser.add_argument("--box-threshold", type=float, default=0.35)
+    parser.add_argument("--text-threshold", type=float, default=0.2)
+    parser.add_argument("--score-tol", type=float, default=1e-4)
+    args = parser.parse_args()
+
+    labels = load_labels(args.labels)
+    processor, model, device = load_model()
+    paths = sorted(
+        os.path.join(args.images, name) for name in os.listdir(args.images)
+        if name.lower().endswith((".jpg", ".jpeg", ".png"))
+    )[:args.limit]
+    print(f"{len(paths)} images x {len(labels)} label batches on {device}")
+
+    # Warm up both paths on the first image
+    process_per_batch(paths[0], labels[:1], processor, model, device, args.box_threshold, args.text_threshold)
+    process_image_with_batches(paths[0], labels[:1], processor, model, device, args.box_threshold, args.text_threshold)
+
+    per_batch_s = reuse_s = 0.0
+    mismatches = 0
+    for path in paths:
+        start = time.perf_counter()
+        reference = process_per_batch(path, labels, processor, model, device, args.box_threshold, args.text_threshold)
+        per_batch_s += time.perf_counter() - start
+
+        start = time.perf_counter()
+        detections = process_image_with_batches(
+            path, labels, processor, model, device, args.box_threshold, args.text_threshold, reuse_features=True
+        )
+        reuse_s += time.perf_counter() - start
+
+        if not agree(reference, detections, args.score_tol):
+            mismatches += 1
+            print(f"  ⚠️ detections differ on {os.path.basename(path)}")
+
+    print(f"per-batch: {per_batch_s / len(paths):.2f} s/image")
+    print(f"reuse:     {reuse_s / len(paths):.2f} s/image ({per_batch_s / reuse_s:.2f}x)")
+    if mismatches:
+        raise SystemExit(f"❌ {mismatches} images with different detections")
+    print("✅ Same detections with image-feature reuse")
@@ -0,0 +1,83 @@
+import numpy as np
+
+
+def as_boxes(boxes, dtype=np.float64) -> np.ndarray:
+    """(N, 4) float array of [x1, y1, x2, y2] boxes from a list, tensor or array."""
+    boxes = np.asarray(boxes, dtype=dtype)
+    return boxes.reshape(-1, 4)
+
+
+def box_area(boxes: np.ndarray) -> np.ndarray:
+    return np.clip(boxes[:, 2] - boxes[:, 0], 0, None) * np.clip(boxes[:, 3] - boxes[:, 1], 0, None)
+
+
+def box_iou(boxes1, boxes2, dtype=np.float64) -> np.ndarray:
+    """
+    Pairwise IoU of two sets of [x1, y1, x2, y2] boxes as an (N, M) array,
+    computed with broadcasting instead of per-pair tensors (same values as
+    torchvision.ops.box_iou for boxes with a positive area).
+    """
+    boxes1, boxes2 = as_boxes(boxes1, dtype), as_boxes(boxes2, dtype)
+    top_left = np.maximum(boxes1[:, None, :2], boxes2[None, :, :2])
+    bottom_right = np.minimum(boxes1[:, None, 2:], boxes2[None, :, 2:])
+    wh = np.clip(bottom_right - top_left, 0, None)
+    inter = wh[..., 0] * wh[..., 1]
+    union = box_area(boxes1)[:, None] + box_area(boxes2)[None, :] - inter
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(union > 0, inter / union, 0.0)
+
+
+def box_iou_pairs(boxes1, boxes2) -> np.ndarray:
+    """IoU of aligned rows: boxes1[i] with boxes2[i], for two (N, 4) arrays."""
+    boxes1, boxes2 = as_boxes(boxes1), as_boxes(boxes2)
+    wh = np.clip(np.minimum(boxes1[:, 2:], boxes2[:, 2:]) - np.maximum(boxes1[:, :2], boxes2[:, :2]), 0, None)
+    inter = wh[:, 0] * wh[:, 1]
+    union = box_area(boxes1) + box_area(boxes2) - inter
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(union > 0, inter / union, 0.0)
+
+
+def dedup_indices(boxes, scores, labels, iou_threshold: float = 0.95, decimals: int = 2) -> np.ndarray:
+    """
+    Class-aware duplicate suppression over stacked boxes (N, 4), scores (N,)
+    and labels (N,) in one call; returns the indices of the kept detections.
+
+    Same semantics as the original greedy loop of deduplicate_detections: in
+    input order, each detection not yet absorbed anchors a cluster of the
+    later unabsorbed detections with the same label and IoU >= iou_threshold
+    against the anchor, and the cluster's highest-scoring member (first on
+    ties) is kept in the anchor's position. Kept detections with the same
+    label and the same box rounded to `decimals` are then reduced to the
+    first one.
+
+    The pairwise IoUs and label masks are a single (N, N) array computation
+    (float32, like the torch tensors it replaces); the remaining loop only
+    visits anchors and works on whole rows.
+    """
+    boxes = as_boxes(boxes)
+    scores = np.asarray(scores, dtype=np.float64)
+    label_ids = np.unique(np.asarray(labels), return_inverse=True)[1].reshape(-1)
+    n = len(boxes)
+    if n == 0:
+        return np.zeros(0, dtype=np.int64)
+
+    same_label = label_ids[:, None] == label_ids[None, :]
+    later = np.triu(np.ones((n, n), dtype=bool), k=1)
+    absorbs = (box_iou(boxes, boxes, np.float32) >= iou_threshold) & same_label & later
+
+    used = np.zeros(n, dtype=bool)
+    keep = []
+    for anchor in range(n):
+        if used[anchor]:
+            continue
+        cluster = absorbs[anchor] & ~used
+        cluster[anchor] = True
+        members = np.flatnonzero(cluster)
+        keep.append(members[np.argmax(scores[members])])
+        used |= cluster
+    keep = np.array(keep, dtype=np.int64)
+
+    # Literal duplicates (label + rounded box): keep the first occurrence, in order
+    keys = np.column_stack([label_ids[keep], np.round(boxes[keep], decimals)])
+    first = np.unique(keys, axis=0, return_index=True)[1]
+    return keep[np.sort(first)]
@@ -0,0 +1,313 @@
+"""
+Accuracy evaluation of cached detections against ground-truth boxes.
+
+Both files map image names to detection lists, the format written by
+base_object_dino.py (detection_results.json):
+
+    ground truth:  {"img.png": [{"label": "tent", "box": [x1, y1, x2, y2]}, ...]}
+    predictions:   {"img.png": [{"label": "a tent on the sidewalk", "score": 0.61,
+                                 "box": [...], "ce_score": 0.4}, ...]}
+
+Images missing from the ground truth are ignored, so list images without
+anomalies with an empty list. Predictions are mapped to the ground-truth classes by exact label or, like
+ALLOWED_KEYWORDS in the backend, by the class name occurring in the label.
+Everything is flattened into arrays once; matching, PR curves and AP are
+array ops, so sweeping a threshold only re-filters and re-matches arrays
+instead of re-running any model. Cache predictions at the loosest
+thresholds and sweep any numeric field they carry ("score" for
+threshold/box_threshold, "ce_score" for ce_threshold, "text_score" when
+cached for text_threshold).
+
+Usage:
+    python evaluation.py --gt ground_truth.json --pred detection_results.json
+    python evaluation.py --gt gt.json --pred preds.json --sweep ce_score=0:0.5:0.05 --output eval.json
+"""
+import argparse
+import json
+
+import numpy as np
+
+from box_ops import box_iou, box_iou_pairs
+
+
+def load_json(file_path):
+    with open(file_path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def class_of(label: str, classes: list[str]):
+    """Index of the class a label belongs to, or None."""
+    label = label.strip().lower()
+    if label in classes:
+        return classes.index(label)
+    for index, name in enumerate(classes):
+        if name in label:
+            return index
+    return None
+
+
+def flatten(per_image: dict, images: list[str], classes: list[str], fields=("score",)) -> dict:
+    """
+    Flatten {image: [detection, ...]} into arrays: "image" and "cls" indices,
+    "boxes" (N, 4) and one float array per numeric field (missing values are
+    NaN). Detections whose label maps to no class are counted in "unmapped".
+    """
+    image_index = {name: index for index, name in enumerate(images)}
+    rows, unmapped = [], 0
+    for name, detections in per_image.items():
+        if name not in image_index:
+            continue
+        for det in detections:
+            cls = class_of(det["label"], classes)
+            if cls is None:
+                unmapped += 1
+                continue
+            rows.append((image_index[name], cls, det["box"], [det.get(field, np.nan) for field in fields]))
+
+    flat = {
+        "image": np.array([r[0] for r in rows], dtype=np.int64),
+        "cls": np.array([r[1] for r in rows], dtype=np.int64),
+        "boxes": np.array([r[2] for r in rows], dtype=np.float64).reshape(-1, 4),
+        "unmapped": unmapped,
+    }
+    values = np.empty((len(rows), len(fields)), dtype=np.float64)
+    for index, row in enumerate(rows):
+        values[index] = row[3]
+    for column, field in enumerate(fields):
+        flat[field] = values[:, column]
+    return flat
+
+
+def select(flat: dict, mask: np.ndarray) -> dict:
+    return {key: value[mask] if isinstance(value, np.ndarray) else value for key, value in flat.items()}
+
+
+def prepare_matching(pred: dict, gt: dict, num_classes: int, iou_threshold: float = 0.5) -> dict:
+    """
+    The threshold-independent part of matching, computed once: the IoU of
+    every (prediction, ground truth) pair of the same image and class as one
+    flat array, whether each prediction overlaps any ground-truth box by at
+    least iou_threshold, and the few groups where several predictions
+    compete for the same ground-truth box. Only those conflict groups depend
+    on which predictions are kept.
+    """
+    has_match = np.zeros(len(pred["score"]), dtype=bool)
+    conflicts = []
+    if not len(has_match) or not len(gt["cls"]):
+        return {"has_match": has_match, "conflicts": conflicts}
+
+    pred_group = pred["image"] * num_classes + pred["cls"]
+    gt_group = gt["image"] * num_classes + gt["cls"]
+    order = np.lexsort((-pred["score"], pred_group))
+    gt_order = np.argsort(gt_group, kind="stable")
+    sorted_gt_group = gt_group[gt_order]
+
+    # Every prediction paired with each ground-truth box of its group
+    gt_starts = np.searchsorted(sorted_gt_group, pred_group[order], side="left")
+    counts = np.searchsorted(sorted_gt_group, pred_group[order], side="right") - gt_starts
+    pair_pred = np.repeat(order, counts)
+    pair_offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    pair_gt = gt_order[np.repeat(gt_starts, counts) + pair_offsets]
+    candidates = box_iou_pairs(pred["boxes"][pair_pred], gt["boxes"][pair_gt]) >= iou_threshold
+    has_match[pair_pred[candidates]] = True
+
+    # Groups with a ground-truth box that more than one prediction overlaps
+    contested = np.bincount(pair_gt[candidates], minlength=len(gt_group)) > 1
+    conflict_groups = np.unique(gt_group[contested])
+    if len(conflict_groups):
+        sorted_groups = pred_group[order]
+        starts = np.searchsorted(sorted_groups, conflict_groups, side="left")
+        ends = np.searchsorted(sorted_groups, conflict_groups, side="right")
+        g_starts = np.searchsorted(sorted_gt_group, conflict_groups, side="left")
+        g_ends = np.searchsorted(sorted_gt_group, conflict_groups, side="right")
+        for start, end, g_start, g_end in zip(starts, ends, g_starts, g_ends):
+            members = order[start:end]
+            ious = box_iou(pred["boxes"][members], gt["boxes"][gt_order[g_start:g_end]])
+            ious[ious < iou_threshold] = -1
+            conflicts.append((members, ious))
+    return {"has_match": has_match, "conflicts": conflicts}
+
+
+def assign(prepared: dict, keep: np.ndarray = None) -> np.ndarray:
+    """
+    True-positive flag per prediction when only the `keep` predictions are
+    evaluated (all when None), from a prepare_matching() result.
+
+    Matching is greedy and one-to-one in descending score order within each
+    (image, class) group, as in COCO evaluation: a prediction takes the
+    highest-IoU ground-truth box not matched yet. Outside conflict groups
+    that is simply "overlaps some ground-truth box", so only the conflict
+    groups are walked again.
+    """
+    tp = prepared["has_match"].copy() if keep is None else prepared["has_match"] & keep
+    for members, ious in prepared["conflicts"]:
+        rows = range(len(members)) if keep is None else np.flatnonzero(keep[members])
+        tp[members] = False
+        taken = np.zeros(ious.shape[1], dtype=bool)
+        for row in rows:
+            available = np.where(taken, -1, ious[row])
+            best = available.argmax()
+            if available[best] >= 0:
+                tp[members[row]] = True
+                taken[best] = True  # each ground-truth box is matched at most once
+    return tp
+
+
+def match(pred: dict, gt: dict, num_classes: int, iou_threshold: float = 0.5) -> np.ndarray:
+    """True-positive flag per prediction (in the input order), see assign()."""
+    return assign(prepare_matching(pred, gt, num_classes, iou_threshold))
+
+
+def pr_curve(scores: np.ndarray, tp: np.ndarray, num_gt: int):
+    """Precision and recall after each prediction in descending score order."""
+    order = np.argsort(-scores, kind="stable")
+    tp_cum = np.cumsum(tp[order])
+    fp_cum = np.cumsum(~tp[order])
+    precision = tp_cum / np.maximum(tp_cum + fp_cum, 1)
+    recall = tp_cum / num_gt if num_gt else np.zeros_like(precision, dtype=np.float64)
+    return precision, recall, scores[order]
+
+
+def average_precision(precision: np.ndarray, recall: np.ndarray) -> float:
+    """Area under the precision envelope (all-point interpolation)."""
+    if not len(precision):
+        return 0.0
+    envelope = np.maximum.accumulate(precision[::-1])[::-1]
+    steps = np.diff(np.concatenate(([0.0], recall)))
+    return float(np.sum(steps * envelope))
+
+
+def evaluate(pred: dict, gt: dict, classes: list[str], iou_threshold: float = 0.5, curves: bool = False,
+             tp: np.ndarray = None) -> dict:
+    """
+    Per-class AP, precision, recall and F1 (at the given predictions), plus
+    mAP. Pass `tp` from assign() to skip matching.
+    """
+    if tp is None:
+        tp = match(pred, gt, len(classes), iou_threshold)
+    gt_counts = np.bincount(gt["cls"], minlength=len(classes))
+    per_class = {}
+    for cls, name in enumerate(classes):
+        mask = pred["cls"] == cls
+        num_gt = int(gt_counts[cls])
+        precision, recall, scores = pr_curve(pred["score"][mask], tp[mask], num_gt)
+        hits = int(tp[mask].sum())
+        p = hits / int(mask.sum()) if mask.any() else 0.0
+        r = hits / num_gt if num_gt else 0.0
+        per_class[name] = {
+            "gt": num_gt,
+            "predictions": int(mask.sum()),
+            "tp": hits,
+            "ap": round(average_precision(precision, recall), 4) if num_gt else None,
+            "precision": round(p, 4),
+            "recall": round(r, 4),
+            "f1": round(2 * p * r / (p + r), 4) if p + r else 0.0,
+        }
+        if curves:
+            per_class[name]["curve"] = {
+                "precision": precision.round(4).tolist(),
+                "recall": recall.round(4).tolist(),
+                "score": scores.round(4).tolist(),
+            }
+    aps = [c["ap"] for c in per_class.values() if c["ap"] is not None]
+    return {"map": round(float(np.mean(aps)), 4) if aps else 0.0, "classes": per_class}
+
+
+def sweep(pred: dict, gt: dict, classes: list[str], field: str, values, iou_threshold: float = 0.5,
+          prepared: dict = None) -> list[dict]:
+    """
+    Evaluate with predictions filtered to `field >= value` for each value.
+    Grouping and IoUs are computed once (or taken from `prepared`); each
+    value only masks the score-sorted arrays and re-walks the conflict groups.
+    """
+    if prepared is None:
+        prepared = prepare_matching(pred, gt, len(classes), iou_threshold)
+    order = np.argsort(-pred["score"], kind="stable")
+    pred = select(pred, order)
+    has_match = prepared["has_match"][order]
+    position = np.empty_like(order)
+    position[order] = np.arange(len(order))
+    prepared = {
+        "has_match": has_match,
+        "conflicts": [(position[members], ious) for members, ious in prepared["conflicts"]],
+    }
+    field_values = np.nan_to_num(pred[field], nan=-np.inf)
+
+    results = []
+    for value in values:
+        keep = field_values >= value
+        tp = assign(prepared, keep)
+        report = evaluate(select(pred, keep), gt, classes, iou_threshold, tp=tp[keep])
+        results.append({
+            field: round(float(value), 4),
+            "map": report["map"],
+            **{name: {k: c[k] for k in ("precision", "recall", "f1")} for name, c in report["classes"].items()},
+        })
+    return results
+
+
+def parse_sweep(spec: str):
+    """"ce_score=0:0.5:0.05" -> ("ce_score", [0, 0.05, ..., 0.5])."""
+    field, _, values = spec.partition("=")
+    start, stop, step = map(float, values.split(":"))
+    return field, np.round(np.arange(start, stop + step / 2, step), 6)
+
+
+def plot_curves(report: dict, save_to: str):
+    import matplotlib.pyplot as plt
+
+    plt.figure(figsize=(6, 6))
+    for name, stats in report["classes"].items():
+        if stats["gt"]:
+            plt.plot(stats["curve"]["recall"], stats["curve"]["precision"], label=f"{name} (AP {stats['ap']:.2f})")
+    plt.xlabel("Recall")
+    plt.ylabel("Precision")
+    plt.xlim(0, 1)
+    plt.ylim(0, 1.05)
+    plt.legend()
+    plt.title(f"Precision / recall (mAP {report['map']:.3f})")
+    plt.savefig(save_to, bbox_inches="tight")
+
+
+def main(argv=None) -> dict:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--gt", required=True, help="ground-truth JSON")
+    parser.add_argument("--pred", required=True, help="cached predictions JSON")
+    parser.add_argument("--iou", type=float, default=0.5)
+    parser.add_argument("--sweep", action="append", default=[], help="field=start:stop:step, repeatable")
+    parser.add_argument("--plot", help="save the PR curves to this image")
+    parser.add_argument("--output", help="write the report JSON here")
+    args = parser.parse_args(argv)
+
+    ground_truth = load_json(args.gt)
+    predictions = load_json(args.pred)
+    images = sorted(ground_truth)
+    classes = sorted({det["label"].strip().lower() for dets in ground_truth.values() for det in dets})
+    sweeps = [parse_sweep(spec) for spec in args.sweep]
+    fields = ["score"] + [field for field, _ in sweeps if field != "score"]
+
+    gt = flatten(ground_truth, images, classes, fields=())
+    pred = flatten(predictions, images, classes, fields)
+    print(f"{len(images)} images, {len(classes)} classes, {len(gt['cls'])} ground-truth boxes, "
+          f"{len(pred['cls'])} predictions ({pred['unmapped']} with labels outside the classes)")
+
+    prepared = prepare_matching(pred, gt, len(classes), args.iou)
+    report = evaluate(pred, gt, classes, args.iou, curves=bool(args.plot), tp=assign(prepared))
+    for name, stats in report["classes"].items():
+        print(f"  {name}: AP={stats['ap']} P={stats['precision']} R={stats['recall']} F1={stats['f1']}")
+    print(f"mAP@{args.iou}: {report['map']}")
+    if args.plot:
+        plot_curves(report, args.plot)
+        for stats in report["classes"].values():
+            stats.pop("curve")
+
+    report["sweeps"] = {field: sweep(pred, gt, classes, field, values, args.iou, prepared) for field, values in sweeps}
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"✅ Saved {args.output}")
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+from collections import OrderedDict
+from contextlib import contextmanager
+
+import torch
+
+
+def _tensor_key(value):
+    if isinstance(value, torch.Tensor):
+        return (tuple(value.shape), str(value.dtype), value.detach().cpu().numpy().tobytes())
+    return value
+
+
+# Same behaviour as backend/detection_models/prompt_cache.py (this package does not import the backend)
+class CachedTextBackbone(torch.nn.Module):
+    """
+    Drop-in wrapper around Grounding DINO's BERT text backbone that returns
+    the stored output when it sees the exact same token tensors again: an
+    LRU of at most `max_entries` encodings. Over a directory every label
+    batch is encoded once instead of once per image, as long as all batches
+    fit (see cache_text_backbone).
+    """
+
+    def __init__(self, backbone, max_entries=16):
+        super().__init__()
+        self.backbone = backbone
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._outputs = OrderedDict()
+
+    def forward(self, *args, **kwargs):
+        if torch.is_grad_enabled():
+            return self.backbone(*args, **kwargs)
+        key = (
+            tuple(_tensor_key(arg) for arg in args),
+            tuple(sorted((name, _tensor_key(value)) for name, value in kwargs.items())),
+        )
+        if key in self._outputs:
+            self._outputs.move_to_end(key)
+            self.hits += 1
+            return self._outputs[key]
+        output = self.backbone(*args, **kwargs)
+        self.misses += 1
+        self._outputs[key] = output
+        while len(self._outputs) > self.max_entries:
+            self._outputs.popitem(last=False)
+        return output
+
+    def clear(self):
+        self._outputs.clear()
+
+
+def cache_text_backbone(model, max_entries=16) -> CachedTextBackbone:
+    """
+    Wrap the text backbone of a Grounding DINO model once; returns the
+    wrapper. Calling it again with a larger `max_entries` raises the bound.
+    """
+    inner = model.model
+    if not isinstance(inner.text_backbone, CachedTextBackbone):
+        inner.text_backbone = CachedTextBackbone(inner.text_backbone, max_entries)
+    inner.text_backbone.max_entries = max(inner.text_backbone.max_entries, max_entries)
+    return inner.text_backbone
+
+
+def encode_prompts(processor, label_batches, device) -> list:
+    """Tokenize every label batch once; reuse the result for all images."""
+    return [processor(text=labels, return_tensors="pt").to(device) for labels in label_batches]
+
+
+class CachedVisionBackbone(torch.nn.Module):
+    """
+    Wraps Grounding DINO's image backbone (Swin + position embeddings) and
+    returns the previous output while it is called again with the very same
+    pixel_values / pixel_mask tensors, i.e. for every label batch of one image.
+    """
+
+    def __init__(self, backbone):
+        super().__init__()
+        self.backbone = backbone
+        self.inputs = None
+        self.output = None
+        self.hits = 0
+
+    def forward(self, pixel_values, pixel_mask):
+        if self.inputs is not None and self.inputs[0] is pixel_values and self.inputs[1] is pixel_mask:
+            self.hits += 1
+            return self.output
+        self.output = self.backbone(pixel_values, pixel_mask)
+        self.inputs = (pixel_values, pixel_mask)
+        return self.output
+
+
+@contextmanager
+def reuse_image_features(model, enabled: bool = True):
+    """
+    Within the block, the image backbone of `model` runs once per image
+    tensor: label batches sharing one preprocessed image only run the
+    text-conditioned encoder/decoder. The original backbone is restored on
+    exit, so no features outlive the block.
+    """
+    if not enabled or torch.is_grad_enabled():
+        yield
+        return
+    inner = model.model
+    original = inner.backbone
+    inner.backbone = CachedVisionBackbone(original)
+    try:
+        yield inner.backbone
+    finally:
+        inner.backbone = original
@@ -0,0 +1,58 @@
+import json
+
+import numpy as np
+
+from evaluation import evaluate, flatten, main
+
+GROUND_TRUTH = {
+    "a.png": [{"label": "tent", "box": [0, 0, 10, 10]}],
+    "b.png": [{"label": "graffiti", "box": [20, 20, 40, 40]}],
+    "c.png": [],
+}
+PREDICTIONS = {
+    "a.png": [
+        {"label": "a tent on the sidewalk", "score": 0.9, "ce_score": 0.3, "box": [0, 0, 10, 10]},
+        {"label": "tent", "score": 0.4, "ce_score": 0.1, "box": [0, 0, 10, 9]},
+    ],
+    "b.png": [{"label": "graffiti", "score": 0.7, "box": [50, 50, 60, 60]}],
+    "c.png": [{"label": "a bench", "score": 0.8, "box": [1, 1, 5, 5]}],
+}
+CLASSES = ["graffiti", "tent"]
+IMAGES = sorted(GROUND_TRUTH)
+
+
+def test_flatten_without_fields():
+    gt = flatten(GROUND_TRUTH, IMAGES, CLASSES, fields=())
+    assert gt["cls"].tolist() == [1, 0]
+    assert gt["boxes"].shape == (2, 4)
+
+
+def test_flatten_fields_and_unmapped():
+    pred = flatten(PREDICTIONS, IMAGES, CLASSES, ("score", "ce_score"))
+    assert pred["unmapped"] == 1
+    assert pred["score"].tolist() == [0.9, 0.4, 0.7]
+    assert np.isnan(pred["ce_score"][2])
+
+
+def test_evaluate_matches_each_ground_truth_once():
+    gt = flatten(GROUND_TRUTH, IMAGES, CLASSES, fields=())
+    pred = flatten(PREDICTIONS, IMAGES, CLASSES)
+    report = evaluate(pred, gt, CLASSES)
+    assert report["classes"]["tent"]["tp"] == 1
+    assert report["classes"]["tent"]["precision"] == 0.5
+    assert report["classes"]["tent"]["ap"] == 1.0
+    assert report["classes"]["graffiti"]["tp"] == 0
+    assert report["map"] == 0.5
+
+
+def test_cli(tmp_path):
+    gt_path, pred_path, out_path = tmp_path / "gt.json", tmp_path / "pred.json", tmp_path / "eval.json"
+    gt_path.write_text(json.dumps(GROUND_TRUTH))
+    pred_path.write_text(json.dumps(PREDICTIONS))
+    report = main([
+        "--gt", str(gt_path), "--pred", str(pred_path),
+        "--sweep", "ce_score=0:0.2:0.1", "--output", str(out_path),
+    ])
+    assert report["map"] == 0.5
+    assert [point["tent"]["precision"] for point in report["sweeps"]["ce_score"]] == [0.5, 0.5, 1.0]
+    assert json.loads(out_path.read_text())["map"] == 0.5